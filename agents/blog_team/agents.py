@@ -1,23 +1,16 @@
+from functools import lru_cache
 from typing import Literal
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_openai import ChatOpenAI
 from langgraph.types import Command
-from langchain.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
 from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate
+from agents.blog_team.answer_cache import answer_cache
+from agents.blog_team.vectorstore.retriever import BlogRetriever
 from agents.orchestrator.state import State
 from langgraph.prebuilt import create_react_agent
 
 
-def initialize_rag_chain():
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-large")
-    vectorstore = Chroma(
-        collection_name="blog_posts",
-        embedding_function=embeddings,
-        persist_directory="./blog_posts_vectorstore",
-    )
-
-    template = """You are an assistant for question-answering tasks. 
+RAG_TEMPLATE = """You are an assistant for question-answering tasks. 
     Use the following pieces of retrieved context to answer the question. 
     For each sentence that you generate, provide the url of the blog post that you used to generate the sentence (cite the source).
     If you don't know the answer, just say that you don't know. 
@@ -26,28 +19,48 @@ def initialize_rag_chain():
     Context: {context}
     Answer:"""
 
-    prompt = ChatPromptTemplate([SystemMessagePromptTemplate.from_template(template)])
+RAG_PROMPT = ChatPromptTemplate(
+    [SystemMessagePromptTemplate.from_template(RAG_TEMPLATE)]
+)
 
-    return vectorstore, prompt
 
+@lru_cache(maxsize=None)
+def _rag_llm() -> ChatOpenAI:
+    return ChatOpenAI(model="gpt-4o")
 
-def blog_team_rag_node(state: State) -> Command[Literal["generator"]]:
-    llm = ChatOpenAI(model="gpt-4o")
-    vectorstore, prompt = initialize_rag_chain()
 
-    query = state["messages"][-1].content
-    retrieved_docs = vectorstore.similarity_search(query)
-
-    context = ""
-    for doc in retrieved_docs:
-        flat_metadata = "\n".join([f"{k}:{v}" for k, v in doc.metadata.items()])
-        context += f"URL: {doc.metadata['url']}\nContent: {doc.page_content}\n{flat_metadata}\n"
-
-    messages = prompt.invoke({"question": query, "context": context})
+def initialize_rag_chain():
+    """The shared blog vectorstore and the RAG prompt."""
+    return BlogRetriever().vectorstore, RAG_PROMPT
 
-    response = llm.invoke(messages)
 
-    blog_results = response.content
+def blog_team_rag_node(state: State) -> Command[Literal["generator"]]:
+    query = state["messages"][-1].content
+    retriever = BlogRetriever()
+    # Embedded once, for both the answer cache and the vectorstore
+    query_vector = retriever.embed_query(query)
+    generation = retriever.generation
+
+    retrieved_docs = retriever.search_by_vector(query_vector)
+    urls = [doc.metadata["url"] for doc in retrieved_docs]
+
+    # Only the LLM call is skipped on a hit: the retrieval is what tells
+    # whether a cached answer is about the same posts
+    cached = answer_cache.lookup(query_vector, generation, urls)
+    if cached is not None:
+        blog_results = cached.answer
+    else:
+        context = ""
+        for doc in retrieved_docs:
+            flat_metadata = "\n".join([f"{k}:{v}" for k, v in doc.metadata.items()])
+            context += f"URL: {doc.metadata['url']}\nContent: {doc.page_content}\n{flat_metadata}\n"
+
+        messages = RAG_PROMPT.invoke({"question": query, "context": context})
+
+        response = _rag_llm().invoke(messages)
+
+        blog_results = response.content
+        answer_cache.store(query, query_vector, blog_results, urls, generation)
 
     return Command(
         update={
@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from agents.blog_team.vectorstore.embedding_cache import normalize_text
+
+ANSWER_CACHE_TTL = int(os.getenv("BLOG_ANSWER_CACHE_TTL", "3600"))  # seconds
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("BLOG_ANSWER_CACHE_MAX_ENTRIES", "256"))
+# Cosine similarity from which two refined queries count as the same question
+ANSWER_CACHE_THRESHOLD = float(os.getenv("BLOG_ANSWER_CACHE_THRESHOLD", "0.92"))
+# Share of posts (Jaccard) a stored answer's sources must have in common with
+# the posts retrieved for the new query
+ANSWER_CACHE_MIN_OVERLAP = float(os.getenv("BLOG_ANSWER_CACHE_MIN_OVERLAP", "0.5"))
+
+
+@dataclass
+class CachedAnswer:
+    query: str
+    answer: str
+    urls: List[str]
+    vector: np.ndarray  # unit length
+    generation: int
+    expires_at: float
+
+
+class SemanticAnswerCache:
+    """
+    TTL + LRU cache of blog answers, looked up by meaning.
+
+    Answers are stored with the embedding of the refined query they answer
+    and the URLs of the posts they were built from. A later query gets that
+    answer back when its embedding has a cosine similarity of at least
+    `threshold` with the stored one and the posts retrieved for it overlap
+    the answer's sources by at least `min_overlap`: similar wording about a
+    different place (Kish vs. Qeshm) retrieves other posts and misses. Each
+    answer belongs to the vectorstore
+    generation it was retrieved from (see `BlogRetriever.reload`); answers
+    from an earlier generation are never served, since the posts behind
+    them may have been re-ingested.
+    """
+
+    def __init__(
+        self,
+        ttl: float = ANSWER_CACHE_TTL,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        min_overlap: float = ANSWER_CACHE_MIN_OVERLAP,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.min_overlap = min_overlap
+        self.hits = 0
+        self.misses = 0
+
+        self._generation = 0
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, generation: int) -> None:
+        # Called with self._lock held
+        self._generation = max(self._generation, generation)
+        now = time.monotonic()
+        for key in [
+            key
+            for key, entry in self._entries.items()
+            if entry.expires_at <= now or entry.generation != self._generation
+        ]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def lookup(
+        self, vector: List[float], generation: int, urls: Iterable[str]
+    ) -> Optional[CachedAnswer]:
+        """
+        The closest stored answer to an embedded query that is close enough
+        and built from the posts retrieved for it (`urls`).
+        """
+        query = _unit(vector)
+        retrieved = set(urls)
+        with self._lock:
+            self._evict(generation)
+            if generation < self._generation or not self._entries:
+                self.misses += 1
+                return None
+
+            keys = list(self._entries)
+            similarities = np.stack([self._entries[key].vector for key in keys]) @ query
+            for index in np.argsort(-similarities):
+                if similarities[index] < self.threshold:
+                    break
+                entry = self._entries[keys[index]]
+                if _overlap(entry.urls, retrieved) >= self.min_overlap:
+                    self.hits += 1
+                    self._entries.move_to_end(keys[index])
+                    return entry
+
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        query: str,
+        vector: List[float],
+        answer: str,
+        urls: List[str],
+        generation: int,
+    ) -> None:
+        key = normalize_text(query)
+        with self._lock:
+            if generation < self._generation:
+                # Retrieved just before a reload
+                return
+            self._entries[key] = CachedAnswer(
+                query=query,
+                answer=answer,
+                urls=list(dict.fromkeys(urls)),
+                vector=_unit(vector),
+                generation=generation,
+                expires_at=time.monotonic() + self.ttl,
+            )
+            self._entries.move_to_end(key)
+            self._evict(generation)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _overlap(urls: Iterable[str], retrieved: set) -> float:
+    urls = set(urls)
+    union = urls | retrieved
+    return len(urls & retrieved) / len(union) if union else 0.0
+
+
+def _unit(vector: List[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
+
+
+answer_cache = SemanticAnswerCache()
@@ -1,27 +1,15 @@
-from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import Runnable
 
-from typing import List, AsyncGenerator
+from typing import List, AsyncGenerator, Optional
 
+from agents.browser import BrowserPool
+from agents.blog_team.answer_cache import answer_cache
+from agents.blog_team.crawl.pipeline import IngestionPipeline
 from agents.blog_team.vectorstore.handler import VectorStoreHandler
 from agents.blog_team.schema import BlogPost
 
 
-def clean_html(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
-
-    # Remove script and style elements
-    for tag in soup(["script", "style", "header", "footer", "nav"]):
-        tag.decompose()
-
-    # Get text and remove extra whitespace
-    text = soup.get_text(separator="\n")
-    cleaned_text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
-
-    return cleaned_text
-
-
 async def crawl_blog_urls(use_cached=False) -> List[str]:
     """
     Crawls tahagasht.com to extract URLs of blog posts
@@ -33,11 +21,7 @@ async def crawl_blog_urls(use_cached=False) -> List[str]:
     base_url = "https://www.tahagasht.com/weblog/sitemap.xml"
     blog_urls = []
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context()
-        page = await context.new_page()
-
+    async with BrowserPool().page() as page:
         try:
             # Get the first page to find total number of pages
             await page.goto(f"{base_url}/")
@@ -74,51 +58,22 @@ async def crawl_blog_urls(use_cached=False) -> List[str]:
         except Exception as e:
             print(f"An error occurred while crawling: {e}")
 
-        finally:
-            await browser.close()
-
     print(f"Found {len(blog_urls)} blog post URLs")
     with open("blog_urls.txt", "w") as f:
         f.write("\n".join(blog_urls))
     return blog_urls
 
 
-async def process_blog_posts(blog_urls) -> AsyncGenerator[BlogPost, None]:
-    llm = ChatOpenAI(temperature=0, model="gpt-4o-mini")
-    llm_with_structured_output = llm.with_structured_output(BlogPost)
-
-    system_prompt = """You are a blog post content extraction assistant. Your task is to process the provided cleaned text of a blog post and extract structured information according to the schema described below. Your output must be valid JSON and follow the schema exactly without any additional commentary or markdown formatting.
-
-    KEEP EVERYTHING IN PERSIAN LANGUAGE.
-    DO NOT ADD ANY ADDITIONAL TEXT OR COMMENTS TO THE OUTPUT.
-    
-    Now, process the following cleaned text:
+async def process_blog_posts(
+    blog_urls, extractor: Optional[Runnable] = None
+) -> AsyncGenerator[BlogPost, None]:
     """
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context()
-        page = await context.new_page()
-
-        for url in blog_urls:
-            try:
-                await page.goto(url)
-                await page.wait_for_load_state("networkidle")
-
-                html_content = await page.content()
-                cleaned_content = clean_html(html_content)
-
-                # Process with LLM
-                blog_post = llm_with_structured_output.invoke(
-                    f"{system_prompt}\nCleaned Text:\n{cleaned_content}\nURL: {url}"
-                )
-
-                yield blog_post
-
-            except Exception as e:
-                print(f"An error occurred while processing blog post: {e}")
-
-        await browser.close()
+    Load each blog post and extract its structured content. `extractor`
+    turns the prompt into a BlogPost; gpt-4o-mini with structured output by
+    default. Posts are yielded as they are extracted, not in input order.
+    """
+    async for post in IngestionPipeline(extractor=extractor).run(blog_urls):
+        yield post
 
 
 async def crawl_and_process_blog_posts() -> None:
@@ -136,26 +91,28 @@ async def crawl_and_process_blog_posts() -> None:
         print(f"Found {len(blog_urls)} blog URLs")
 
         print("Filtering already existing URLs...")
-        blog_urls = [
-            url
-            for url in blog_urls
-            if not await vectorstore.url_exists_in_vectorstore(url)
-        ]
+        ingested = await vectorstore.ingested_urls()
+        blog_urls = [url for url in blog_urls if url not in ingested]
         print(f"Found {len(blog_urls)} new blog URLs")
 
-        # Step 2: Process blog posts to extract structured content
+        # Steps 2 and 3: Fetch, clean and extract the blog posts and store
+        # the structured content in the vectorstore, all stages at once
         print("\nProcessing blog posts...")
+        pipeline = IngestionPipeline(
+            store=lambda post: vectorstore.process_and_store_blog_posts([post])
+        )
         i = 0
-        async for post in process_blog_posts(blog_urls):
-            try:
-                # Step 3: Store the structured content in the vectorstore
-                ids = await vectorstore.process_and_store_blog_posts([post])
-                print(f"Processed blog post {i + 1}({len(ids)}): {post.url}")
-                i += 1
-            except Exception as e:
-                print(f"An error occurred while processing blog post: {e}\n{post}")
-
-        print(f"Successfully processed {len(blog_urls)} blog posts")
+        async for post in pipeline.run(blog_urls):
+            i += 1
+            print(f"Processed blog post {i}: {post.url}")
+
+        print(pipeline.report())
+        print(f"Successfully processed {i} of {len(blog_urls)} blog posts")
+
+        # The store is shared with this process's retriever, so questions
+        # see the new posts right away; cached answers may not
+        if i:
+            answer_cache.invalidate()
 
         return vectorstore
 
@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Awaitable, Callable, List, Optional
+
+from bs4 import BeautifulSoup
+from langchain_core.runnables import Runnable
+from langchain_openai import ChatOpenAI
+from playwright.async_api import BrowserContext
+
+from agents.blog_team.schema import BlogPost
+from agents.browser import BrowserPool, block_heavy_resources
+from agents.browser.routing import BLOCKED_RESOURCE_TYPES
+
+logger = logging.getLogger(__name__)
+
+# Workers per stage. Fetch workers are pages of one browser context, extract
+# workers are LLM requests in flight.
+FETCH_CONCURRENCY = int(os.getenv("BLOG_FETCH_CONCURRENCY", "4"))
+CLEAN_CONCURRENCY = int(os.getenv("BLOG_CLEAN_CONCURRENCY", "2"))
+EXTRACT_CONCURRENCY = int(os.getenv("BLOG_EXTRACT_CONCURRENCY", "8"))
+STORE_CONCURRENCY = int(os.getenv("BLOG_STORE_CONCURRENCY", "2"))
+# Items waiting in front of a stage, per worker of that stage; a full queue
+# holds back the stage feeding it
+QUEUE_DEPTH_PER_WORKER = 2
+
+EXTRACTION_PROMPT = """You are a blog post content extraction assistant. Your task is to process the provided cleaned text of a blog post and extract structured information according to the schema described below. Your output must be valid JSON and follow the schema exactly without any additional commentary or markdown formatting.
+
+    KEEP EVERYTHING IN PERSIAN LANGUAGE.
+    DO NOT ADD ANY ADDITIONAL TEXT OR COMMENTS TO THE OUTPUT.
+
+    Now, process the following cleaned text:
+    """
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+def clean_html(html: str) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Remove script and style elements
+    for tag in soup(["script", "style", "header", "footer", "nav"]):
+        tag.decompose()
+
+    # Get text and remove extra whitespace
+    text = soup.get_text(separator="\n")
+    cleaned_text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+    return cleaned_text
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    busy: float = 0.0  # seconds spent on items, summed over the workers
+
+    def throughput(self, elapsed: float) -> float:
+        """Items per second over the whole run."""
+        return self.processed / elapsed if elapsed else 0.0
+
+    def utilization(self, elapsed: float) -> float:
+        """Share of the run its workers were busy; near 1 for the bottleneck."""
+        return self.busy / (self.workers * elapsed) if elapsed else 0.0
+
+
+class IngestionPipeline:
+    """
+    Blog ingestion as four stages running side by side:
+
+        fetch -> clean -> extract -> store
+
+    Each stage has its own number of workers and reads from a bounded
+    queue, so a slow stage holds back the ones before it instead of letting
+    pages pile up in memory. Pages are fetched by tabs of one browser
+    context, HTML is cleaned on worker threads, extraction awaits the LLM
+    (`ainvoke`) and `store` is awaited with each extracted post. A failing
+    item is reported and dropped without stopping the others.
+    """
+
+    def __init__(
+        self,
+        extractor: Optional[Runnable] = None,
+        store: Optional[Callable[[BlogPost], Awaitable[Any]]] = None,
+        fetch_concurrency: int = FETCH_CONCURRENCY,
+        clean_concurrency: int = CLEAN_CONCURRENCY,
+        extract_concurrency: int = EXTRACT_CONCURRENCY,
+        store_concurrency: int = STORE_CONCURRENCY,
+    ):
+        if extractor is None:
+            llm = ChatOpenAI(temperature=0, model="gpt-4o-mini")
+            extractor = llm.with_structured_output(BlogPost)
+        self.extractor = extractor
+        self.store = store
+
+        self.stages = [
+            StageStats("fetch", fetch_concurrency),
+            StageStats("clean", clean_concurrency),
+            StageStats("extract", extract_concurrency),
+        ]
+        if store is not None:
+            self.stages.append(StageStats("store", store_concurrency))
+        self.elapsed = 0.0
+
+    async def run(self, urls: List[str]) -> AsyncGenerator[BlogPost, None]:
+        """Yield the posts of `urls` as they come out of the last stage."""
+        inboxes = [asyncio.Queue()] + [
+            asyncio.Queue(maxsize=stage.workers * QUEUE_DEPTH_PER_WORKER)
+            for stage in self.stages[1:]
+        ]
+        results: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_DEPTH_PER_WORKER)
+        outboxes = inboxes[1:] + [results]
+        for url in urls:
+            inboxes[0].put_nowait((url, url))
+        inboxes[0].put_nowait(_DONE)
+
+        async def run_stages() -> None:
+            try:
+                async with asyncio.TaskGroup() as group:
+                    for stage, inbox, outbox in zip(self.stages, inboxes, outboxes):
+                        group.create_task(
+                            self._stage(stage, inbox, outbox, outbox is not results)
+                        )
+            finally:
+                await results.put(_DONE)
+
+        started = time.perf_counter()
+        task = asyncio.create_task(run_stages())
+        try:
+            while (item := await results.get()) is not _DONE:
+                yield item[1]
+            await task
+        finally:
+            task.cancel()
+            self.elapsed = time.perf_counter() - started
+
+    async def _stage(
+        self,
+        stats: StageStats,
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+        feeds_stage: bool,
+    ) -> None:
+        if stats.name == "fetch":
+            async with BrowserPool().context() as context:
+                await asyncio.gather(
+                    *[
+                        self._fetch_worker(stats, context, inbox, outbox)
+                        for _ in range(stats.workers)
+                    ]
+                )
+        else:
+            process = {
+                "clean": self._clean,
+                "extract": self._extract,
+                "store": self._store,
+            }[stats.name]
+            await asyncio.gather(
+                *[
+                    self._worker(stats, process, inbox, outbox)
+                    for _ in range(stats.workers)
+                ]
+            )
+
+        if feeds_stage:
+            await outbox.put(_DONE)
+
+    async def _worker(
+        self,
+        stats: StageStats,
+        process: Callable[[str, Any], Awaitable[Any]],
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+    ) -> None:
+        # Items are (url, what the previous stage made of it)
+        while (item := await inbox.get()) is not _DONE:
+            url, payload = item
+            started = time.perf_counter()
+            try:
+                result = await process(url, payload)
+            except Exception:
+                stats.failed += 1
+                logger.exception(
+                    "An error occurred in the %s stage for %s", stats.name, url
+                )
+                continue
+            finally:
+                stats.busy += time.perf_counter() - started
+            stats.processed += 1
+            await outbox.put((url, result))
+
+        # Let the stage's other workers see the end of the input too
+        inbox.put_nowait(_DONE)
+
+    async def _fetch_worker(
+        self,
+        stats: StageStats,
+        context: BrowserContext,
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+    ) -> None:
+        page = await context.new_page()
+        try:
+            # Blog posts are server-rendered, so the HTML is all we read
+            await block_heavy_resources(
+                page, blocked_resource_types=BLOCKED_RESOURCE_TYPES | {"stylesheet"}
+            )
+
+            async def fetch(url: str, _: Any) -> str:
+                await page.goto(url, wait_until="domcontentloaded")
+                return await page.content()
+
+            await self._worker(stats, fetch, inbox, outbox)
+        finally:
+            await page.close()
+
+    async def _clean(self, url: str, html: str) -> str:
+        # BeautifulSoup is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(clean_html, html)
+
+    async def _extract(self, url: str, cleaned_content: str) -> BlogPost:
+        return await self.extractor.ainvoke(
+            f"{EXTRACTION_PROMPT}\nCleaned Text:\n{cleaned_content}\nURL: {url}"
+        )
+
+    async def _store(self, url: str, post: BlogPost) -> BlogPost:
+        await self.store(post)
+        return post
+
+    def report(self) -> str:
+        """Per-stage throughput and utilization of the last run."""
+        lines = [f"Pipeline ran for {self.elapsed:.1f}s"]
+        for stage in self.stages:
+            lines.append(
+                f"  {stage.name:<8} {stage.processed:>5} ok {stage.failed:>4} failed "
+                f"{stage.throughput(self.elapsed):>7.2f}/s "
+                f"{stage.utilization(self.elapsed):>5.0%} busy x{stage.workers}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from agents.db import ConnectionManager
+
+EMBEDDING_CACHE_PATH = os.getenv("BLOG_EMBEDDING_CACHE_PATH", "blog_embeddings.db")
+# Embeddings kept in memory (LRU); every one is also kept on disk
+EMBEDDING_CACHE_SIZE = int(os.getenv("BLOG_EMBEDDING_CACHE_SIZE", "4096"))
+
+# A lost last write under WAL only costs one more embeddings request
+EMBEDDING_CACHE_PRAGMAS = {"synchronous": "NORMAL"}
+
+_WHITESPACE = re.compile(r"\s+")
+# Arabic letters typed on some keyboards in place of their Persian forms
+_PERSIAN_LETTERS = str.maketrans({"\u064a": "\u06cc", "\u0643": "\u06a9"})
+
+
+def normalize_text(text: str) -> str:
+    """
+    The form of a text its cache key is computed from: Unicode NFKC with
+    Arabic yeh and kaf written in their Persian forms, case-folded, and runs
+    of whitespace (including zero-width non-joiners) turned into one space.
+    """
+    text = unicodedata.normalize("NFKC", text).translate(_PERSIAN_LETTERS)
+    text = text.replace("\u200c", " ")
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings that are computed once per text.
+
+    Wraps another `Embeddings` and keeps every vector it returns, keyed by
+    the model and a hash of the normalized text: the most recent ones in an
+    in-memory LRU, all of them in a SQLite file shared by every process, so
+    repeated blog questions and re-ingested posts skip the embeddings API.
+    Texts missing from both are embedded in one batch.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str,
+        path: str = EMBEDDING_CACHE_PATH,
+        max_entries: int = EMBEDDING_CACHE_SIZE,
+        in_memory: bool = False,
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.max_entries = max_entries
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.connections = ConnectionManager(
+            path, in_memory=in_memory, pragmas=EMBEDDING_CACHE_PRAGMAS
+        )
+        with self.connections.write() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    vector BLOB NOT NULL
+                )
+            """)
+
+    def _key(self, text: str) -> str:
+        # Queries and documents share keys: OpenAI embeds both the same way
+        normalized = f"{self.model}\0{normalize_text(text)}"
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = vector
+            self.memory_hits += len(found)
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if not missing:
+            return found
+
+        from_disk: Dict[str, List[float]] = {}
+        with self.connections.read() as cursor:
+            # Stay well under SQLite's bound parameter limit
+            for start in range(0, len(missing), 500):
+                chunk = missing[start : start + 500]
+                rows = cursor.execute(
+                    "SELECT key, vector FROM embeddings WHERE key IN "
+                    f"({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for row in rows:
+                    from_disk[row["key"]] = array("f", row["vector"]).tolist()
+
+        with self._lock:
+            self.disk_hits += len(from_disk)
+            for key, vector in from_disk.items():
+                self._remember(key, vector)
+        found.update(from_disk)
+        return found
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        # Called with self._lock held
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _store(self, vectors: Dict[str, List[float]]) -> None:
+        with self.connections.write() as cursor:
+            cursor.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                [
+                    (key, self.model, array("f", vector).tobytes())
+                    for key, vector in vectors.items()
+                ],
+            )
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+
+    def _pending(
+        self, texts: List[str]
+    ) -> Tuple[List[str], Dict[str, List[float]], Dict[str, str]]:
+        """Keys of `texts`, the cached vectors, and the texts to embed by key."""
+        keys = [self._key(text) for text in texts]
+        found = self._lookup(keys)
+        # One embedding per distinct missing text
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        with self._lock:
+            self.misses += len(missing)
+        return keys, found, missing
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._pending(texts)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            self._store(computed)
+            found.update(computed)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, found, missing = self._pending([text])
+        if missing:
+            found[keys[0]] = self.embeddings.embed_query(text)
+            self._store({keys[0]: found[keys[0]]})
+        return found[keys[0]]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # SQLite stays off the event loop
+        keys, found, missing = await asyncio.to_thread(self._pending, texts)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            await asyncio.to_thread(self._store, computed)
+            found.update(computed)
+        return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, found, missing = await asyncio.to_thread(self._pending, [text])
+        if missing:
+            found[keys[0]] = await self.embeddings.aembed_query(text)
+            await asyncio.to_thread(self._store, {keys[0]: found[keys[0]]})
+        return found[keys[0]]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "in_memory": len(self._entries),
+            }
+
+
+@lru_cache(maxsize=None)
+def cached_embeddings(model: str, path: Optional[str] = None) -> CachedEmbeddings:
+    """The process-wide cached OpenAI embeddings for `model`."""
+    return CachedEmbeddings(
+        OpenAIEmbeddings(model=model), model, path=path or EMBEDDING_CACHE_PATH
+    )
@@ -1,32 +1,63 @@
+import asyncio
+
 import chromadb
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores.chroma import Chroma
-from typing import List
+from typing import Dict, List, Optional
 from agents.blog_team.schema import BlogPost
-from agents.blog_team.vectorstore.utils import blog_post_to_document
+from agents.blog_team.vectorstore.embedding_cache import cached_embeddings
+from agents.blog_team.vectorstore.utils import (
+    blog_post_fingerprint,
+    blog_post_to_document,
+)
+
+COLLECTION_NAME = "blog_posts"
+PERSIST_DIRECTORY = "./blog_posts_vectorstore"
+EMBEDDING_MODEL = "text-embedding-3-large"
+# Chunk metadata read per query while building the ingested-URL index
+INDEX_PAGE_SIZE = 5000
 
 
 class VectorStoreHandler:
     def __init__(
         self,
-        collection_name: str = "blog_posts",
-        persist_directory: str = "./blog_posts_vectorstore",
+        collection_name: str = COLLECTION_NAME,
+        persist_directory: str = PERSIST_DIRECTORY,
     ):
         self.persist_directory = persist_directory
         self.client = chromadb.PersistentClient(path=persist_directory)
         self.collection_name = collection_name
-        self.embedding_function = OpenAIEmbeddings(model="text-embedding-3-large")
+        self.embedding_function = cached_embeddings(EMBEDDING_MODEL)
         self.vectorstore = Chroma(
             collection_name=self.collection_name,
             client=self.client,
             embedding_function=self.embedding_function,
         )
+        # URL -> fingerprint of every stored post; see ingested_urls
+        self._ingested: Optional[Dict[str, Optional[str]]] = None
 
     async def process_and_store_blog_posts(
         self, blog_posts: List[BlogPost]
     ) -> List[str]:
-        """Process and store blog posts in the vectorstore"""
+        """
+        Process and store blog posts in the vectorstore. A post already
+        stored with the same content is skipped; one whose content changed
+        replaces its old chunks.
+        """
+        ingested = await self.ingested_urls()
+        fingerprints = {post.url: blog_post_fingerprint(post) for post in blog_posts}
+        blog_posts = [
+            post
+            for post in blog_posts
+            if ingested.get(post.url, "") != fingerprints[post.url]
+        ]
+        if not blog_posts:
+            return []
+
+        replaced = [post.url for post in blog_posts if post.url in ingested]
+        if replaced:
+            collection = self.client.get_collection(self.collection_name)
+            await asyncio.to_thread(collection.delete, where={"url": {"$in": replaced}})
 
         documents = [blog_post_to_document(post) for post in blog_posts]
 
@@ -38,12 +69,38 @@ class VectorStoreHandler:
 
         ID_list = await self.vectorstore.aadd_documents(split_docs)
 
+        for post in blog_posts:
+            ingested[post.url] = fingerprints[post.url]
+
         return ID_list
 
-    async def url_exists_in_vectorstore(self, url: str) -> bool:
-        """Check if a URL already exists in the vectorstore"""
-        # Query the collection's metadata for the URL
+    async def ingested_urls(self) -> Dict[str, Optional[str]]:
+        """
+        URL -> content fingerprint of every post in the vectorstore (None
+        for posts stored before fingerprints were), read in one pass on
+        first use and kept up to date as posts are stored.
+        """
+        if self._ingested is None:
+            ingested = await asyncio.to_thread(self._load_ingested_urls)
+            if self._ingested is None:
+                self._ingested = ingested
+        return self._ingested
+
+    def _load_ingested_urls(self) -> Dict[str, Optional[str]]:
         collection = self.client.get_collection(self.collection_name)
-        results = collection.get(where={"url": url})
+        ingested: Dict[str, Optional[str]] = {}
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["metadatas"], limit=INDEX_PAGE_SIZE, offset=offset
+            )
+            for metadata in page["metadatas"]:
+                if metadata and metadata.get("url"):
+                    ingested[metadata["url"]] = metadata.get("fingerprint")
+            if len(page["ids"]) < INDEX_PAGE_SIZE:
+                return ingested
+            offset += INDEX_PAGE_SIZE
 
-        return len(results["ids"]) > 0
+    async def url_exists_in_vectorstore(self, url: str) -> bool:
+        """Check if a URL already exists in the vectorstore"""
+        return url in await self.ingested_urls()
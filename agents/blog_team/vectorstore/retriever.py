@@ -0,0 +1,148 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import chromadb
+from chromadb.api.client import SharedSystemClient
+from langchain_community.vectorstores.chroma import Chroma
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from agents.blog_team.vectorstore.embedding_cache import cached_embeddings
+from agents.blog_team.vectorstore.handler import (
+    COLLECTION_NAME,
+    EMBEDDING_MODEL,
+    PERSIST_DIRECTORY,
+)
+
+# Seconds a reload waits for searches on the previous store to finish
+RELOAD_TIMEOUT = 30
+
+
+class BlogRetriever:
+    """
+    Process-wide, thread-safe handle on the blog posts vectorstore.
+
+    The embeddings client and the Chroma store are opened on first use and
+    shared by every request, so a query only costs its embedding call and
+    the nearest-neighbour search. Ingestion in the same process writes
+    through the same Chroma instance and needs no reload; a process that
+    only reads the store calls `reload` after another one re-ingested it.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super(BlogRetriever, cls).__new__(cls)
+                instance._initialize(*args, **kwargs)
+                cls._instance = instance
+        return cls._instance
+
+    def _initialize(
+        self,
+        collection_name: str = COLLECTION_NAME,
+        persist_directory: str = PERSIST_DIRECTORY,
+        embeddings: Optional[Embeddings] = None,
+    ):
+        self.collection_name = collection_name
+        self.persist_directory = persist_directory
+        self.embeddings = embeddings
+        # Bumped by every reload, so caches built on the store's contents
+        # can tell they are out of date
+        self.generation = 0
+        self.loads = 0
+
+        self._vectorstore: Optional[Chroma] = None
+        self._lock = threading.Lock()
+        # Searches running on each open store, by id(); see reload
+        self._searches: Dict[int, int] = {}
+        self._searches_done = threading.Condition(self._lock)
+
+    @property
+    def vectorstore(self) -> Chroma:
+        vectorstore = self._vectorstore
+        if vectorstore is None:
+            with self._lock:
+                if self._vectorstore is None:
+                    self._vectorstore = self._open()
+                vectorstore = self._vectorstore
+        return vectorstore
+
+    def _open(self) -> Chroma:
+        if self.embeddings is None:
+            self.embeddings = cached_embeddings(EMBEDDING_MODEL)
+        vectorstore = Chroma(
+            collection_name=self.collection_name,
+            client=chromadb.PersistentClient(path=self.persist_directory),
+            embedding_function=self.embeddings,
+        )
+        self.loads += 1
+        return vectorstore
+
+    @contextmanager
+    def _searching(self) -> Iterator[Chroma]:
+        """The current store, kept open by `reload` until the block exits."""
+        vectorstore = self.vectorstore
+        with self._lock:
+            self._searches[id(vectorstore)] = self._searches.get(id(vectorstore), 0) + 1
+        try:
+            yield vectorstore
+        finally:
+            with self._lock:
+                self._searches[id(vectorstore)] -= 1
+                if not self._searches[id(vectorstore)]:
+                    del self._searches[id(vectorstore)]
+                    self._searches_done.notify_all()
+
+    def search(self, query: str, k: int = 4) -> List[Document]:
+        """The `k` blog post chunks closest to `query`."""
+        with self._searching() as vectorstore:
+            return vectorstore.similarity_search(query, k=k)
+
+    def embed_query(self, query: str) -> List[float]:
+        return self.vectorstore.embeddings.embed_query(query)
+
+    def search_by_vector(self, vector: List[float], k: int = 4) -> List[Document]:
+        """The `k` blog post chunks closest to an embedded query."""
+        with self._searching() as vectorstore:
+            return vectorstore.similarity_search_by_vector(vector, k=k)
+
+    def reload(self, timeout: Optional[float] = RELOAD_TIMEOUT) -> None:
+        """
+        Re-open the store from disk, picking up posts another process
+        ingested since it was opened.
+
+        Only call this in a process that reads the store and does not write
+        it: Chroma shares one instance per path within a process, and the
+        previous one is stopped once the searches running on it finish (or
+        after `timeout` seconds), which would break a writer still using it.
+        """
+        with self._lock:
+            previous = self._vectorstore
+            # Drop this path's shared instance, and only it, so that the new
+            # client reads the files afresh
+            previous_system = SharedSystemClient._identifier_to_system.pop(
+                self.persist_directory, None
+            )
+            self._vectorstore = self._open()
+            self.generation += 1
+
+            if previous is not None:
+                self._searches_done.wait_for(
+                    lambda: id(previous) not in self._searches, timeout
+                )
+        if previous_system is not None:
+            previous_system.stop()
+
+    def stats(self) -> Dict:
+        return {
+            "loaded": self._vectorstore is not None,
+            "loads": self.loads,
+            "generation": self.generation,
+            "embeddings": (
+                self.embeddings.stats() if hasattr(self.embeddings, "stats") else None
+            ),
+        }
@@ -1,7 +1,14 @@
+import hashlib
+
 from agents.blog_team.schema import BlogPost
 from langchain.docstore.document import Document
 
 
+def blog_post_fingerprint(blog_post: BlogPost) -> str:
+    """Hash of everything stored for a blog post, to tell if it changed"""
+    return hashlib.sha256(blog_post.model_dump_json().encode("utf-8")).hexdigest()
+
+
 def blog_post_to_document(blog_post: BlogPost) -> Document:
     """Convert a BlogPost object to a Document object"""
     # Convert FAQ list to string if exists
@@ -17,6 +24,7 @@ def blog_post_to_document(blog_post: BlogPost) -> Document:
         "url": blog_post.url,
         "published_date": blog_post.published_date if blog_post.published_date else "",
         "summary": blog_post.summary if blog_post.summary else "",
+        "fingerprint": blog_post_fingerprint(blog_post),
     }
     if blog_post.metadata:
         flat_metadata.update(
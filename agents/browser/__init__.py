@@ -0,0 +1,16 @@
+from agents.browser.loop import (
+    arun_in_crawler_loop,
+    get_crawler_loop,
+    run_in_crawler_loop,
+)
+from agents.browser.pool import BrowserPool
+from agents.browser.routing import block_heavy_resources, wait_for_selector_or_idle
+
+__all__ = [
+    "BrowserPool",
+    "block_heavy_resources",
+    "wait_for_selector_or_idle",
+    "get_crawler_loop",
+    "run_in_crawler_loop",
+    "arun_in_crawler_loop",
+]
@@ -0,0 +1,84 @@
+import asyncio
+import atexit
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Coroutine, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SHUTDOWN_TIMEOUT = 10  # seconds
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+_shutdown_hooks: List[Callable[[], Awaitable[Any]]] = []
+
+
+def get_crawler_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the process-wide event loop the crawlers run on, starting it in a
+    daemon thread on first use.
+
+    Pooled browsers and HTTP clients are bound to the loop that created them,
+    so running every crawl on this one loop lets them be reused across tool
+    calls, threads and chat sessions.
+    """
+    global _loop, _thread
+
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(
+                target=_loop.run_forever, name="crawler-loop", daemon=True
+            )
+            _thread.start()
+            atexit.register(_shutdown)
+        return _loop
+
+
+def submit(coro: Coroutine[Any, Any, T]) -> "Future[T]":
+    """Schedule `coro` on the crawler loop from any thread."""
+    return asyncio.run_coroutine_threadsafe(coro, get_crawler_loop())
+
+
+def run_in_crawler_loop(coro: Coroutine[Any, Any, T]) -> T:
+    """Run `coro` on the crawler loop and block until it is done."""
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError(
+            "run_in_crawler_loop() would deadlock on the crawler loop; await "
+            "arun_in_crawler_loop() instead."
+        )
+    return submit(coro).result()
+
+
+async def arun_in_crawler_loop(coro: Coroutine[Any, Any, T]) -> T:
+    """Await `coro` on the crawler loop from any event loop."""
+    if asyncio.get_running_loop() is _loop:
+        return await coro
+    return await asyncio.wrap_future(submit(coro))
+
+
+def add_shutdown_hook(hook: Callable[[], Awaitable[Any]]) -> None:
+    """Register a coroutine function to run on the crawler loop at exit."""
+    _shutdown_hooks.append(hook)
+
+
+def _shutdown() -> None:
+    async def run_hooks():
+        for hook in _shutdown_hooks:
+            try:
+                await hook()
+            except Exception:
+                logger.exception(
+                    "An error occurred while shutting down the crawler loop"
+                )
+
+    try:
+        submit(run_hooks()).result(timeout=SHUTDOWN_TIMEOUT)
+    except Exception:
+        logger.exception("Crawler loop did not shut down cleanly")
+    _loop.call_soon_threadsafe(_loop.stop)
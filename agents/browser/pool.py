@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
+
+from playwright.async_api import (
+    Browser,
+    BrowserContext,
+    Page,
+    Playwright,
+    async_playwright,
+)
+from playwright.async_api import Error as PlaywrightError
+
+from agents.browser.loop import add_shutdown_hook
+from agents.browser.routing import block_heavy_resources
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+DEFAULT_MAX_PAGES_PER_CONTEXT = int(os.getenv("BROWSER_POOL_MAX_PAGES", "50"))
+DEFAULT_BLOCK_RESOURCES = os.getenv("CRAWLER_BLOCK_RESOURCES", "1") == "1"
+
+
+@dataclass
+class _PooledContext:
+    context: BrowserContext
+    generation: int
+    pages_served: int = 0
+    closed: bool = False
+
+
+class BrowserPool:
+    """
+    Process-wide pool of Chromium browser contexts.
+
+    A single browser is launched lazily on first use and kept alive between
+    searches. Callers borrow a context (or a single page in one) and give it
+    back when done. At most ``size`` contexts are lent out at once; a context
+    is recycled after serving ``max_pages_per_context`` pages, and the browser
+    is relaunched if it crashed or disconnected. Unless disabled, every
+    context aborts images, fonts and media, and requests to hosts outside
+    CRAWLER_ALLOWED_DOMAINS when that is set.
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(BrowserPool, cls).__new__(cls)
+            cls._instance._initialize(*args, **kwargs)
+        return cls._instance
+
+    def _initialize(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        max_pages_per_context: int = DEFAULT_MAX_PAGES_PER_CONTEXT,
+        headless: bool = True,
+        block_resources: bool = DEFAULT_BLOCK_RESOURCES,
+    ):
+        if size < 1:
+            raise ValueError("Browser pool size must be at least 1.")
+
+        self.size = size
+        self.max_pages_per_context = max_pages_per_context
+        self.headless = headless
+        self.block_resources = block_resources
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._generation = 0
+        self._idle: List[_PooledContext] = []
+
+    def _bind_loop(self) -> None:
+        """
+        Bind the pool to the running event loop.
+
+        Playwright objects cannot be used from a loop other than the one that
+        created them, so the pool starts from scratch when it is first used
+        from a new loop. Callers running on short-lived loops should
+        ``close()`` the pool before their loop finishes.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+
+        self._loop = loop
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(self.size)
+        self._playwright = None
+        self._browser = None
+        self._idle = []
+
+    def _is_healthy(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def _ensure_browser(self) -> None:
+        async with self._lock:
+            if self._is_healthy():
+                return
+
+            if self._browser is not None:
+                logger.warning("Browser disconnected, relaunching...")
+                try:
+                    await self._browser.close()
+                except PlaywrightError:
+                    pass
+
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.headless
+            )
+            self._generation += 1
+            self._idle = []
+
+    async def _new_context(self) -> _PooledContext:
+        context = await self._browser.new_context()
+        if self.block_resources:
+            await block_heavy_resources(context)
+        pooled = _PooledContext(context=context, generation=self._generation)
+
+        def on_page(_page: Page) -> None:
+            pooled.pages_served += 1
+
+        def on_close(_context: BrowserContext) -> None:
+            pooled.closed = True
+
+        context.on("page", on_page)
+        context.on("close", on_close)
+        return pooled
+
+    def _is_reusable(self, pooled: _PooledContext) -> bool:
+        return (
+            not pooled.closed
+            and pooled.generation == self._generation
+            and pooled.pages_served < self.max_pages_per_context
+            and self._is_healthy()
+        )
+
+    async def _discard(self, pooled: _PooledContext) -> None:
+        if pooled.closed:
+            return
+        try:
+            await pooled.context.close()
+        except PlaywrightError:
+            pass
+
+    async def _checkout(self) -> _PooledContext:
+        await self._ensure_browser()
+
+        while self._idle:
+            pooled = self._idle.pop()
+            if self._is_reusable(pooled):
+                return pooled
+            await self._discard(pooled)
+
+        return await self._new_context()
+
+    async def _checkin(self, pooled: _PooledContext) -> None:
+        if self._is_reusable(pooled):
+            # Drop pages the borrower forgot to close so they do not pile up
+            for page in pooled.context.pages:
+                try:
+                    await page.close()
+                except PlaywrightError:
+                    pass
+            self._idle.append(pooled)
+        else:
+            await self._discard(pooled)
+
+    @asynccontextmanager
+    async def context(self) -> AsyncIterator[BrowserContext]:
+        """Borrow a browser context from the pool."""
+        self._bind_loop()
+
+        async with self._slots:
+            pooled = await self._checkout()
+            try:
+                yield pooled.context
+            finally:
+                await self._checkin(pooled)
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Borrow a fresh page in one of the pooled contexts."""
+        async with self.context() as context:
+            page = await context.new_page()
+            try:
+                yield page
+            finally:
+                if not page.is_closed():
+                    await page.close()
+
+    async def close(self) -> None:
+        """Close all idle contexts, the browser and the Playwright driver."""
+        if self._loop is not asyncio.get_running_loop():
+            return
+
+        async with self._lock:
+            for pooled in self._idle:
+                await self._discard(pooled)
+            self._idle = []
+
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except PlaywrightError:
+                    pass
+                self._browser = None
+
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+
+add_shutdown_hook(lambda: BrowserPool().close())
@@ -0,0 +1,102 @@
+import asyncio
+import os
+from typing import Iterable, Union
+from urllib.parse import urlparse
+
+from playwright.async_api import BrowserContext, Page, Route, TimeoutError
+
+# Resource types none of the crawlers read
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+# Hosts (and their subdomains) pages may load resources from; everything
+# else, such as ads, analytics and chat widgets, is aborted. Empty (the
+# default) allows every host: the site's results come from CDN and API hosts
+# outside its own domain, so an allow-list has to name them all
+ALLOWED_DOMAINS = tuple(
+    domain.strip()
+    for domain in os.getenv("CRAWLER_ALLOWED_DOMAINS", "").split(",")
+    if domain.strip()
+)
+
+
+def is_allowed_host(url: str, allowed_domains: Iterable[str]) -> bool:
+    """Whether `url` is on one of `allowed_domains`; any host is when it is empty."""
+    allowed_domains = tuple(allowed_domains)
+    if not allowed_domains:
+        return True
+    host = urlparse(url).hostname or ""
+    return any(
+        host == domain or host.endswith(f".{domain}") for domain in allowed_domains
+    )
+
+
+async def block_heavy_resources(
+    target: Union[BrowserContext, Page],
+    allowed_domains: Iterable[str] = ALLOWED_DOMAINS,
+    blocked_resource_types: Iterable[str] = BLOCKED_RESOURCE_TYPES,
+) -> None:
+    """
+    Abort requests the crawlers never need on a context or a single page.
+
+    Args:
+        target (Union[BrowserContext, Page]): Where to install the route. Page
+            routes take precedence over the routes of their context.
+        allowed_domains (Iterable[str]): Hosts requests may go to. Empty
+            allows every host.
+        blocked_resource_types (Iterable[str]): Playwright resource types to
+            abort even on allowed hosts.
+    """
+    allowed_domains = tuple(allowed_domains)
+    blocked_resource_types = frozenset(blocked_resource_types)
+
+    async def handle(route: Route) -> None:
+        request = route.request
+        if request.resource_type in blocked_resource_types or (
+            allowed_domains and not is_allowed_host(request.url, allowed_domains)
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await target.route("**/*", handle)
+
+
+async def wait_for_selector_or_idle(
+    page: Page, selector: str, timeout: float = 60000, settle_timeout: float = 5000
+) -> bool:
+    """
+    Wait for `selector` to appear without waiting for the whole page to go
+    idle first.
+
+    If the network goes idle before the selector shows up, the selector gets
+    `settle_timeout` more milliseconds, which keeps "no results" pages from
+    waiting the full `timeout`.
+
+    Returns:
+        bool: Whether the selector appeared.
+    """
+    found = asyncio.ensure_future(page.wait_for_selector(selector, timeout=timeout))
+    idle = asyncio.ensure_future(
+        page.wait_for_load_state("networkidle", timeout=timeout)
+    )
+
+    try:
+        await asyncio.wait({found, idle}, return_when=asyncio.FIRST_COMPLETED)
+        if found.done():
+            error = found.exception()
+            if error is None:
+                return True
+            if isinstance(error, TimeoutError):
+                return False
+            raise error
+    finally:
+        for task in (found, idle):
+            task.cancel()
+        # Collect the outcome of both waits so none is reported as unhandled
+        await asyncio.gather(found, idle, return_exceptions=True)
+
+    try:
+        await page.wait_for_selector(selector, timeout=settle_timeout)
+    except TimeoutError:
+        return False
+    return True
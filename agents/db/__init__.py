@@ -0,0 +1,3 @@
+from agents.db.connection import ConnectionManager
+
+__all__ = ["ConnectionManager"]
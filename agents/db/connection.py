@@ -0,0 +1,108 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+BUSY_TIMEOUT = 30  # seconds a connection waits for a lock before failing
+STATEMENT_CACHE_SIZE = 256
+
+
+class ConnectionManager:
+    """
+    SQLite connections for one database shared by many threads.
+
+    Writes go through a single writer connection, serialized by a lock.
+    Reads use a read-only connection per thread, so under WAL journaling
+    they neither block on nor see half-done writes. An in-memory database
+    cannot be shared between connections, so there every read goes through
+    the writer as well.
+
+    `pragmas` are applied to every connection of a file-backed database.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        in_memory: bool = False,
+        pragmas: Optional[Dict[str, Any]] = None,
+    ):
+        self.path = ":memory:" if in_memory else path
+        self.in_memory = in_memory
+        self.pragmas = pragmas or {}
+
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+
+        self.writer = self._connect()
+        if not in_memory:
+            # Only takes effect on a new file
+            self.writer.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self.writer.execute("PRAGMA journal_mode = WAL")
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        if not self.in_memory:
+            for name, value in self.pragmas.items():
+                conn.execute(f"PRAGMA {name} = {value}")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect(read_only=True)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Cursor]:
+        """Cursor on the writer connection, committed or rolled back on exit."""
+        with self._write_lock:
+            cursor = self.writer.cursor()
+            try:
+                yield cursor
+                self.writer.commit()
+            except Exception:
+                self.writer.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Cursor]:
+        """Cursor on this thread's read-only connection."""
+        if self.in_memory:
+            with self._write_lock:
+                cursor = self.writer.cursor()
+                try:
+                    yield cursor
+                finally:
+                    cursor.close()
+            return
+
+        cursor = self._reader().cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    def close(self) -> None:
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+        self._local = threading.local()
+
+        with self._write_lock:
+            self.writer.close()
@@ -1,3 +1,7 @@
-from agents.flight_team.crawl.flight_crawler import search_flights
+from agents.flight_team.crawl.flight_crawler import (
+    search_flights,
+    search_flights_by_date_range,
+)
+from agents.flight_team.crawl.cache import cached_search_flights
 
-__all__ = ["search_flights"]
+__all__ = ["search_flights", "search_flights_by_date_range", "cached_search_flights"]
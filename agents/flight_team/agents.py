@@ -1,6 +1,6 @@
 from datetime import datetime
 import jdatetime
-from typing import Literal
+from typing import Annotated, Literal
 from typing_extensions import TypedDict
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_openai import ChatOpenAI
@@ -8,51 +8,58 @@ from langgraph.prebuilt import create_react_agent
 from langgraph.types import Command
 from agents.flight_team.tools import (
     search_available_flights,
-    query_flight_database,
+    search_flights_in_date_range,
+    find_flights,
     convert_date_to_gregorian,
 )
 from agents.orchestrator.state import State
 import json
 
 
+class FlightResult(TypedDict):
+    """One flight found for the user."""
+
+    airline: str
+    date_time: str
+    flight_number: str
+    origin_code: Annotated[str, ..., "IATA code of the airport the flight leaves from"]
+    dest_code: Annotated[str, ..., "IATA code of the airport the flight lands at"]
+    leg: Annotated[
+        str,
+        ...,
+        'The "leg" of a round-trip search result ("outbound" or "return"); '
+        "empty for one-way flights and database results",
+    ]
+    last_updated: str
+
+
+class FlightNodeResult(TypedDict):
+    """The flights found for the request."""
+
+    results: list[FlightResult]
+
+
 def flight_team_db_node(
     state: State,
 ) -> Command[Literal["flight_team_search", "generator"]]:
     llm = ChatOpenAI(model="gpt-4o", temperature=0)
 
-    class FlightResult(TypedDict):
-        airline: str
-        date_time: str
-        flight_number: str
-        last_updated: str
-
-    class FlightNodeResult(TypedDict):
-        results: list[FlightResult]
-
     # Create the flight database agent
     flight_db_agent = create_react_agent(
         model=llm,
-        tools=[query_flight_database, convert_date_to_gregorian],
-        prompt=f"""You are a flight database specialist. Your task is to query the flights database 
-        to find matching flights. Use SQL queries to search the database.
+        tools=[find_flights],
+        prompt=f"""You are a flight database specialist. Your task is to find matching 
+        flights in the flights database with the find_flights tool, in a single call 
+        whenever possible.
         
-        Here is the flights table schema:
-        CREATE TABLE flights (
-            airline TEXT NOT NULL,
-            departure_datetime TEXT NOT NULL,
-            flight_number TEXT NOT NULL,
-            origin_city TEXT NOT NULL,
-            origin_code TEXT NOT NULL,
-            dest_city TEXT NOT NULL,
-            dest_code TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
+        Pass the origin and destination cities and the departure date (or date range) 
+        from the request, plus the airline or time-of-day window if the user asked 
+        for one. Dates may be given in the Jalaali calendar as well.
         
         Today's date is: 
         - Gregorian calendar: {datetime.now().strftime("%Y-%m-%d")}({datetime.now().strftime("%A, %d %B %Y")})
         - Jalaali calendar: {jdatetime.datetime.now().strftime("%Y-%m-%d")}({jdatetime.datetime.now().strftime("%A, %d %B %Y")})
-        Note that the city names MUST be in English.
-        Your response should be based on the query_flight_database tool function.
+        Your response should be based on the find_flights tool function.
         
         If no flights found IN THE DATABASE, return an empty list. DO NOT GENERATE FROM YOUR OWN KNOWLEDGE.
         """,
@@ -105,23 +112,26 @@ def flight_team_db_node(
 def flight_team_search_node(state: State) -> Command[Literal["generator"]]:
     llm = ChatOpenAI(model="gpt-4o", temperature=0)
 
-    class FlightResult(TypedDict):
-        airline: str
-        date_time: str
-        flight_number: str
-        last_updated: str
-
-    class FlightNodeResult(TypedDict):
-        results: list[FlightResult]
-
     flight_search_agent = create_react_agent(
         model=llm,
-        tools=[search_available_flights, convert_date_to_gregorian],
+        tools=[
+            search_available_flights,
+            search_flights_in_date_range,
+            convert_date_to_gregorian,
+        ],
         prompt=f"""You are a flight search specialist. Your task is to search real-time flight 
         availability. 
 
         Today's date is: {datetime.now().strftime("%Y-%m-%d")} or in Jalaali calendar: {jdatetime.datetime.now().strftime("%Y-%m-%d")}
 
+        For a round trip, make ONE search_available_flights call with the return_date 
+        instead of searching each direction separately. Keep the "leg" of every 
+        result, so outbound and return flights can be told apart.
+
+        When the user is flexible about the date (e.g. "this week", "any day before 
+        Friday"), search the whole range with ONE search_flights_in_date_range call 
+        instead of one search per day.
+
         Answer ONLY based on the search results. If there is no flight data available, 
         return an empty list.
         """,
@@ -1,17 +1,39 @@
-from agents.flight_team.crawl.flight_crawler import search_flights
+from agents.flight_team.crawl.flight_crawler import (
+    FlightSearchResult,
+    search_flights,
+    search_flights_by_date_range,
+    search_flights_result,
+)
+from agents.flight_team.crawl.cache import (
+    FlightSearchCache,
+    cached_search_flights,
+    search_cache,
+)
+from agents.flight_team.crawl.spans import Span, span, span_metrics
 from agents.flight_team.crawl.exceptions import (
     FlightSearchError,
     InvalidFlightClassError,
     InvalidPassengerCountError,
     InvalidAirportCodeError,
     DateConversionError,
+    FlightFetchError,
 )
 
 __all__ = [
     "search_flights",
+    "search_flights_by_date_range",
+    "search_flights_result",
+    "FlightSearchResult",
+    "cached_search_flights",
+    "FlightSearchCache",
+    "search_cache",
+    "Span",
+    "span",
+    "span_metrics",
     "FlightSearchError",
     "InvalidFlightClassError",
     "InvalidPassengerCountError",
     "InvalidAirportCodeError",
     "DateConversionError",
+    "FlightFetchError",
 ]
@@ -0,0 +1,214 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from agents.flight_team.crawl.exceptions import DateConversionError, FlightSearchError
+from agents.flight_team.crawl.flight_crawler import search_flights_result
+from agents.flight_team.crawl.utils.date import convert_to_gregorian
+
+SEARCH_CACHE_TTL = int(os.getenv("FLIGHT_SEARCH_CACHE_TTL", "600"))  # seconds
+# Searches that found no flights may have hit a slow or empty results page,
+# so they are retried sooner
+SEARCH_CACHE_EMPTY_TTL = int(os.getenv("FLIGHT_SEARCH_CACHE_EMPTY_TTL", "60"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("FLIGHT_SEARCH_CACHE_MAX_ENTRIES", "256"))
+
+SearchKey = Tuple[str, str, str, Tuple[int, int, int], str, Optional[str]]
+
+
+def _normalize_date(date_str: Optional[str]) -> Optional[str]:
+    if not date_str:
+        return None
+    try:
+        return convert_to_gregorian(date_str.strip())
+    except DateConversionError:
+        # Left as is; search_flights reports the invalid date
+        return date_str.strip()
+
+
+class FlightSearchCache:
+    """
+    TTL + LRU cache in front of `search_flights`.
+
+    Searches are keyed on the normalized (origin, destination, dates,
+    passengers, class) tuple. Concurrent identical searches are coalesced:
+    the first caller runs the crawl and the others await its result, even
+    when they run on other threads or event loops. Failed searches and
+    searches missing the flights of a route pair that timed out or failed
+    are not cached; searches that found no flights are cached for
+    `empty_ttl` only.
+    """
+
+    def __init__(
+        self,
+        ttl: float = SEARCH_CACHE_TTL,
+        max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+        empty_ttl: float = SEARCH_CACHE_EMPTY_TTL,
+    ):
+        self.ttl = ttl
+        self.empty_ttl = empty_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self._entries: "OrderedDict[SearchKey, Tuple[float, List[Dict]]]" = (
+            OrderedDict()
+        )
+        self._in_flight: Dict[SearchKey, Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        flight_origin: str,
+        flight_dest: str,
+        departure_date: str,
+        passengers_count: tuple[int, int, int],
+        flight_class: str,
+        arrival_date: Optional[str] = None,
+    ) -> SearchKey:
+        return (
+            flight_origin.strip().casefold(),
+            flight_dest.strip().casefold(),
+            _normalize_date(departure_date),
+            tuple(int(count) for count in passengers_count),
+            flight_class.strip().capitalize(),
+            _normalize_date(arrival_date),
+        )
+
+    def _get_fresh(self, key: SearchKey) -> Optional[List[Dict]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, flights = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return flights
+
+    def _store(self, key: SearchKey, flights: List[Dict]) -> None:
+        now = time.monotonic()
+        ttl = self.ttl if flights else self.empty_ttl
+        self._entries[key] = (now + ttl, flights)
+        self._entries.move_to_end(key)
+
+        for stale_key in [k for k, (exp, _) in self._entries.items() if exp <= now]:
+            del self._entries[stale_key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def search(
+        self,
+        flight_origin: str,
+        flight_dest: str,
+        departure_date: str,
+        passengers_count: tuple[int, int, int],
+        flight_class: str,
+        arrival_date: Optional[str] = None,
+    ) -> List[Dict]:
+        """Same as `search_flights`, served from the cache when possible."""
+        key = self.make_key(
+            flight_origin,
+            flight_dest,
+            departure_date,
+            passengers_count,
+            flight_class,
+            arrival_date,
+        )
+
+        with self._lock:
+            flights = self._get_fresh(key)
+            if flights is not None:
+                self.hits += 1
+                return _copy_flights(flights)
+
+            future = self._in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                self.misses += 1
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            return _copy_flights(await asyncio.wrap_future(future))
+
+        try:
+            result = await search_flights_result(
+                flight_origin=flight_origin,
+                flight_dest=flight_dest,
+                departure_date=departure_date,
+                passengers_count=passengers_count,
+                flight_class=flight_class,
+                arrival_date=arrival_date,
+            )
+        except asyncio.CancelledError:
+            future.set_exception(FlightSearchError("The flight search was cancelled."))
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            flights = result.flights
+            if result.complete:
+                with self._lock:
+                    self._store(key, flights)
+            future.set_result(flights)
+            return _copy_flights(flights)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def invalidate(self, key: Optional[SearchKey] = None) -> None:
+        """Drop one cached search, or all of them."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "in_flight": len(self._in_flight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            }
+
+
+def _copy_flights(flights: List[Dict]) -> List[Dict]:
+    # Callers get their own dicts so they cannot alter the cached ones
+    return [dict(flight) for flight in flights]
+
+
+search_cache = FlightSearchCache()
+
+
+async def cached_search_flights(
+    flight_origin: str,
+    flight_dest: str,
+    departure_date: str,
+    passengers_count: tuple[int, int, int],  # (adults, childs, infants)
+    flight_class: str,
+    arrival_date: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Search for flights through the process-wide `search_cache`.
+
+    Takes the same arguments as `search_flights`.
+    """
+    return await search_cache.search(
+        flight_origin=flight_origin,
+        flight_dest=flight_dest,
+        departure_date=departure_date,
+        passengers_count=passengers_count,
+        flight_class=flight_class,
+        arrival_date=arrival_date,
+    )
@@ -26,3 +26,9 @@ class DateConversionError(FlightSearchError):
     """Exception raised for date conversion failures."""
 
     pass
+
+
+class FlightFetchError(FlightSearchError):
+    """Exception raised when no route pair of a search could be fetched."""
+
+    pass
@@ -1,9 +1,17 @@
-from datetime import datetime
-from playwright.async_api import async_playwright
-from playwright.async_api import TimeoutError, Page
-from typing import Optional, List, Dict
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from playwright.async_api import TimeoutError, Page, BrowserContext
+from typing import Awaitable, Callable, Optional, List, Dict, Tuple
+import asyncio
 import json
-
+import logging
+import os
+import time
+
+from agents.browser import BrowserPool, wait_for_selector_or_idle
+from agents.flight_team.crawl.http_fetcher import FLIGHT_FETCH_ENGINE, HttpFlightFetcher
+from agents.flight_team.crawl.search_request import SITE_URL, FlightSearchRequest
+from agents.flight_team.crawl.spans import Span, current_span, span
 from agents.flight_team.crawl.utils import date, airport_codes
 from agents.flight_team.crawl.exceptions import (
     FlightSearchError,
@@ -11,12 +19,117 @@ from agents.flight_team.crawl.exceptions import (
     InvalidPassengerCountError,
     InvalidAirportCodeError,
     DateConversionError,
+    FlightFetchError,
 )
-from agents.flight_team.db.database import Database
-from agents.flight_team.db.models import Flight
+from agents.flight_team.db.writer import FlightWriter
+
+logger = logging.getLogger(__name__)
 
 ALLOWED_FLIGHT_CLASSES = {"Economy", "Business", "First"}
 
+# Route pairs (e.g. THR/IKA x IST/SAW) fetched in parallel per search
+MAX_CONCURRENT_ROUTE_PAIRS = 4
+# Longest range of departure dates a batch search covers
+MAX_DATE_RANGE_DAYS = 14
+# Upper bound for a single route pair, from opening the page to scraping it
+ROUTE_PAIR_TIMEOUT = 150  # seconds
+# Same-origin page opened to reach the site's localStorage before the search
+ORIGIN_URL = f"{SITE_URL}/robots.txt"
+
+# "batch" reads every flight card in a few page evaluations, "per_card"
+# clicks through the cards one at a time
+EXTRACTION_MODE = "batch"
+
+# Browser fetches slower than this many seconds keep a Playwright trace
+# (screenshots and DOM snapshots) in TRACE_DIR; 0 disables tracing
+TRACE_SLOW_SEARCHES = float(os.getenv("CRAWLER_TRACE_SLOW_SECONDS", "0"))
+TRACE_DIR = os.getenv("CRAWLER_TRACE_DIR", "traces")
+
+# Click every card's "جزئیات پرواز" button that is not expanded yet. Clicked
+# cards are marked, so the per-card path does not click them again: on a
+# toggle the second click would close the details.
+EXPAND_DETAILS_JS = """
+() => {
+    let clicked = 0;
+    for (const card of document.querySelectorAll(".flight-card")) {
+        if (card.querySelector(".flight-details") || card.dataset.detailsRequested) {
+            continue;
+        }
+        const button = Array.from(card.querySelectorAll("button")).find(
+            (b) => b.textContent.includes("جزئیات پرواز")
+        );
+        if (button) {
+            button.click();
+            card.dataset.detailsRequested = "1";
+            clicked++;
+        }
+    }
+    return clicked;
+}
+"""
+
+# Whether a card's details are shown or were already asked for
+DETAILS_REQUESTED_JS = """
+(card) => Boolean(card.querySelector(".flight-details") || card.dataset.detailsRequested)
+"""
+
+# True once every card with a details button shows its details
+DETAILS_LOADED_JS = """
+() => Array.from(document.querySelectorAll(".flight-card")).every(
+    (card) =>
+        card.querySelector(".flight-details") ||
+        !Array.from(card.querySelectorAll("button")).some(
+            (b) => b.textContent.includes("جزئیات پرواز")
+        )
+)
+"""
+
+# Read the fields of every flight card in one pass. A card has one
+# .flightInfo row per leg (the outbound leg, then the return leg of a round
+# trip) and its details list the legs' flight numbers in the same order.
+EXTRACT_CARDS_JS = """
+() => Array.from(document.querySelectorAll(".flight-card")).map((card) => {
+    const text = (root, selector) => {
+        const el = root.querySelector(selector);
+        return el ? el.textContent.trim() : null;
+    };
+
+    const legs = Array.from(card.querySelectorAll(".flightInfo")).map((info) => ({
+        airline: text(info, ".col-3"),
+        departure_time: text(info, ".col-2 b"),
+    }));
+
+    const flightNumbers = [];
+    const details = card.querySelector(".flight-details");
+    if (details) {
+        for (const span of details.querySelectorAll("span")) {
+            if (span.textContent.includes("شماره پرواز") && span.children.length) {
+                flightNumbers.push(span.children[0].textContent.trim());
+            }
+        }
+    }
+
+    return {
+        legs: legs,
+        flight_numbers: flightNumbers,
+        has_details_button: Array.from(card.querySelectorAll("button")).some(
+            (b) => b.textContent.includes("جزئیات پرواز")
+        ),
+    };
+})
+"""
+
+
+@dataclass
+class FlightSearchResult:
+    flights: List[Dict]
+    route_pairs: int
+    failed_pairs: int = 0  # timed out or failed; their flights are missing
+
+    @property
+    def complete(self) -> bool:
+        return self.failed_pairs == 0
+
 
 async def search_flights(
     flight_origin: str,
@@ -25,10 +138,7 @@ async def search_flights(
     passengers_count: tuple[int, int, int],  # (adults, childs, infants)
     flight_class: str,
     arrival_date: Optional[str] = None,
-) -> None:
-    print(
-        f"Searching for flights...\n Origin: {flight_origin}\n Destination: {flight_dest}\n Departure Date: {departure_date}\n Passengers: {passengers_count}\n Class: {flight_class}\n Arrival Date: {arrival_date}"
-    )
+) -> List[Dict]:
     """
     Search for flights on tahagasht.com using provided parameters and scrape flight information.
 
@@ -41,12 +151,211 @@ async def search_flights(
         arrival_date (Optional[str]): Return flight date in 'YYYY-MM-DD' format for round trips.
 
     Returns:
-        Optional[List[Dict]]: A list of dictionaries containing flight information, or None if failed.
+        List[Dict]: A list of dictionaries containing flight information.
+        Route pairs that timed out or failed are left out; see
+        `search_flights_result` to tell when that happened.
 
     Raises:
         FlightSearchError: If any validation fails.
+        FlightFetchError: If no route pair could be fetched.
+    """
+    result = await search_flights_result(
+        flight_origin,
+        flight_dest,
+        departure_date,
+        passengers_count,
+        flight_class,
+        arrival_date,
+    )
+    return result.flights
+
+
+async def search_flights_result(
+    flight_origin: str,
+    flight_dest: str,
+    departure_date: str,
+    passengers_count: tuple[int, int, int],  # (adults, childs, infants)
+    flight_class: str,
+    arrival_date: Optional[str] = None,
+) -> FlightSearchResult:
     """
+    Same as `search_flights`, along with how many route pairs failed.
+    """
+    with span(
+        "search",
+        origin=flight_origin,
+        dest=flight_dest,
+        departure_date=departure_date,
+        arrival_date=arrival_date,
+        passengers=passengers_count,
+        flight_class=flight_class,
+    ) as search_span:
+        search, route_pairs = _prepare_search(
+            flight_origin,
+            flight_dest,
+            departure_date,
+            passengers_count,
+            flight_class,
+            arrival_date,
+        )
+
+        # Each pair's flights are stored in the background as soon as they
+        # are scraped, while the remaining pairs are still being fetched
+        writer = FlightWriter()
+        writes = []
+
+        def store(flights: List[Dict]) -> None:
+            if flights:
+                writes.append(asyncio.wrap_future(writer.submit(flights)))
+
+        results = await _fetch_searches(
+            [
+                (search, origin_code, dest_code)
+                for origin_code, dest_code in route_pairs
+            ],
+            on_result=store,
+        )
+
+        # Flights are stored by the time the search returns
+        await _wait_for_writes(writes)
+
+        result = FlightSearchResult(
+            flights=[flight for flights in results if flights for flight in flights],
+            route_pairs=len(route_pairs),
+            failed_pairs=results.count(None),
+        )
+        search_span.set(
+            route_pairs=result.route_pairs,
+            failed_pairs=result.failed_pairs,
+            flights=len(result.flights),
+        )
+        if result.failed_pairs == result.route_pairs:
+            raise FlightFetchError(
+                f"No flights could be fetched from {flight_origin} to "
+                f"{flight_dest}; the flight site did not respond in time."
+            )
+        return result
+
+
+async def search_flights_by_date_range(
+    flight_origin: str,
+    flight_dest: str,
+    date_from: str,
+    date_to: str,
+    passengers_count: tuple[int, int, int],  # (adults, childs, infants)
+    flight_class: str,
+) -> Dict[str, List[Dict]]:
+    """
+    Search one-way flights for every departure date in a range at once.
+
+    All dates and route pairs are fetched concurrently in one browser
+    context, and the flights are stored in a single transaction.
+
+    Args:
+        flight_origin (str): Departure city name (e.g., "Tehran").
+        flight_dest (str): Destination city name (e.g., "Mashhad").
+        date_from (str): First departure date in 'YYYY-MM-DD' format (Gregorian or Jalali).
+        date_to (str): Last departure date (inclusive), in the same format.
+        passengers_count (Tuple[int, int, int]): Number of passengers as (adults, childs, infants).
+        flight_class (str): Class of flight ("Economy", "Business", "First").
 
+    Returns:
+        Dict[str, List[Dict]]: Flights per Gregorian departure date ('YYYY-MM-DD'),
+        in date order.
+
+    Raises:
+        FlightSearchError: If any validation fails or the range is too long.
+    """
+    with span(
+        "search_date_range",
+        origin=flight_origin,
+        dest=flight_dest,
+        date_from=date_from,
+        date_to=date_to,
+    ) as search_span:
+        flights_by_date = await _search_date_range(
+            flight_origin,
+            flight_dest,
+            date_from,
+            date_to,
+            passengers_count,
+            flight_class,
+        )
+        search_span.set(
+            dates=len(flights_by_date),
+            flights=sum(len(flights) for flights in flights_by_date.values()),
+        )
+        return flights_by_date
+
+
+async def _search_date_range(
+    flight_origin: str,
+    flight_dest: str,
+    date_from: str,
+    date_to: str,
+    passengers_count: tuple[int, int, int],
+    flight_class: str,
+) -> Dict[str, List[Dict]]:
+    search, route_pairs = _prepare_search(
+        flight_origin, flight_dest, date_from, passengers_count, flight_class
+    )
+    try:
+        last_date = date.convert_to_gregorian(date_to)
+    except DateConversionError as e:
+        raise FlightSearchError(str(e))
+
+    first_day = datetime.strptime(search.departure_date_greg, "%Y-%m-%d")
+    days = (datetime.strptime(last_date, "%Y-%m-%d") - first_day).days + 1
+    if days < 1:
+        raise FlightSearchError("The last date must not be before the first date.")
+    if days > MAX_DATE_RANGE_DAYS:
+        raise FlightSearchError(
+            f"A date range can span at most {MAX_DATE_RANGE_DAYS} days."
+        )
+
+    searches = [
+        replace(
+            search,
+            departure_date_greg=(first_day + timedelta(days=offset)).strftime(
+                "%Y-%m-%d"
+            ),
+        )
+        for offset in range(days)
+    ]
+    jobs = [
+        (day_search, origin_code, dest_code)
+        for day_search in searches
+        for origin_code, dest_code in route_pairs
+    ]
+    results = await _fetch_searches(jobs)
+    if all(flights is None for flights in results):
+        raise FlightFetchError(
+            f"No flights could be fetched from {flight_origin} to {flight_dest}; "
+            "the flight site did not respond in time."
+        )
+
+    flights_by_date = {day_search.departure_date_greg: [] for day_search in searches}
+    for (day_search, _, _), flights in zip(jobs, results):
+        flights_by_date[day_search.departure_date_greg].extend(flights or [])
+
+    all_flights = [flight for flights in results if flights for flight in flights]
+    if all_flights:
+        await _wait_for_writes(
+            [asyncio.wrap_future(FlightWriter().submit(all_flights))]
+        )
+
+    return flights_by_date
+
+
+def _prepare_search(
+    flight_origin: str,
+    flight_dest: str,
+    departure_date: str,
+    passengers_count: tuple[int, int, int],
+    flight_class: str,
+    arrival_date: Optional[str] = None,
+) -> Tuple[FlightSearchRequest, List[Tuple[str, str]]]:
+    """Validate search parameters and list the route pairs to fetch."""
     adults, childs, infants = passengers_count
 
     if flight_class.capitalize() not in ALLOWED_FLIGHT_CLASSES:
@@ -96,123 +405,260 @@ async def search_flights(
             "The number of infants cannot exceed the number of adults."
         )
 
-    trip_type = "roundtrip" if arrival_date_greg else "oneway"
-
-    all_flights = []
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context()
-
-        for origin_code in origin_codes:
-            for dest_code in dest_codes:
-                if origin_code == "IKA":
-                    continue
-                flight_json = {
-                    "passengers": {
-                        "adults": adults,
-                        "childs": childs,
-                        "infants": infants,
-                    },
-                    "other": {
-                        "trip": trip_type,
-                        "cabin": flight_class.capitalize(),
-                    },
-                    "routes": [
-                        {
-                            "from": {
-                                "is_all": True,
-                                "code": origin_code,
-                                "title": flight_origin.capitalize(),
-                                "country_code": "",
-                                "country_name": "",
-                                "city_name": flight_origin.capitalize(),
-                                "latitude": 0,
-                                "longitude": 0,
-                                "city_fa": "",
-                                "flightMultipleIndex": None,
-                            },
-                            "to": {
-                                "is_all": True,
-                                "code": dest_code,
-                                "title": flight_dest.capitalize(),
-                                "country_code": "",
-                                "country_name": "",
-                                "city_name": flight_dest.capitalize(),
-                                "latitude": 0,
-                                "longitude": 0,
-                                "city_fa": "",
-                                "flightMultipleIndex": None,
-                            },
-                            "dates": {
-                                "departure": departure_date_greg,
-                                "arrival": arrival_date_greg
-                                if arrival_date_greg
-                                else "",
-                            },
-                        }
-                    ],
-                }
-
-                if trip_type == "oneway":
-                    date_part = departure_date_greg
+    search = FlightSearchRequest(
+        flight_origin=flight_origin,
+        flight_dest=flight_dest,
+        departure_date_greg=departure_date_greg,
+        arrival_date_greg=arrival_date_greg,
+        adults=adults,
+        childs=childs,
+        infants=infants,
+        flight_class=flight_class.capitalize(),
+    )
+
+    route_pairs = [
+        (origin_code, dest_code)
+        for origin_code in origin_codes
+        for dest_code in dest_codes
+        if origin_code != "IKA"
+    ]
+
+    return search, route_pairs
+
+
+async def _fetch_searches(
+    jobs: List[Tuple[FlightSearchRequest, str, str]],
+    on_result: Optional[Callable[[List[Dict]], None]] = None,
+) -> List[Optional[List[Dict]]]:
+    """
+    Fetch (search, origin code, destination code) jobs concurrently, over
+    HTTP when enabled and in one shared browser context otherwise.
+
+    Returns each job's flights in job order, None for jobs that timed out
+    or failed. `on_result` is called with a job's flights as soon as they
+    are fetched.
+    """
+    results: List[Optional[List[Dict]]] = [None] * len(jobs)
+
+    def done(index: int, flights: Optional[List[Dict]]) -> None:
+        results[index] = flights
+        if on_result is not None and flights is not None:
+            on_result(flights)
+
+    pending = list(range(len(jobs)))
+
+    if FLIGHT_FETCH_ENGINE == "http":
+        fetcher = HttpFlightFetcher()
+
+        async def fetch_over_http(index: int) -> Optional[List[Dict]]:
+            search, origin_code, dest_code = jobs[index]
+            with span(
+                "http_fetch",
+                origin_code=origin_code,
+                dest_code=dest_code,
+                departure_date=search.departure_date_greg,
+            ) as fetch_span:
+                flights = await fetcher.fetch(search, origin_code, dest_code)
+                if flights is None:
+                    fetch_span.fail("fallback")
                 else:
-                    date_part = f"{departure_date_greg}&{arrival_date_greg}"
+                    fetch_span.set(flights=len(flights))
+                return flights
 
-                url = f"https://www.tahagasht.com/flights/result/{origin_code}-{dest_code}/{date_part}/{trip_type}-{flight_class.capitalize()}-{adults}-{childs}-{infants}"
+        http_results = await asyncio.gather(
+            *[fetch_over_http(index) for index in pending]
+        )
+        for index, flights in zip(pending, http_results):
+            if flights is not None:
+                done(index, flights)
+        # Jobs the API could not serve are rendered in the browser instead
+        pending = [index for index in pending if results[index] is None]
+
+    if pending:
+        # Covers the browser launch when the pool has none running yet
+        acquire_span = Span("acquire_context")
+        async with BrowserPool().context() as context:
+            acquire_span.end()
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_ROUTE_PAIRS)
+            storage_lock = asyncio.Lock()
+
+            async def fetch(index: int) -> None:
+                done(
+                    index,
+                    await _fetch_route_pair_with_timeout(
+                        context, semaphore, storage_lock, *jobs[index]
+                    ),
+                )
 
-                page = await context.new_page()
+            if TRACE_SLOW_SEARCHES > 0:
+                await context.tracing.start(screenshots=True, snapshots=True)
+            started = time.perf_counter()
+            try:
+                await asyncio.gather(*[fetch(index) for index in pending])
+            finally:
+                if TRACE_SLOW_SEARCHES > 0:
+                    await _stop_tracing(context, time.perf_counter() - started)
 
-                init_script = f"""
-                    () => {{
-                        localStorage.setItem("flightJson", `{json.dumps(flight_json)}`);
-                    }}
-                """
-                await page.add_init_script(init_script)
+    return results
 
-                try:
-                    await page.goto(url, timeout=60000)  # 60 seconds timeout
-                    await page.evaluate(init_script)
-                    await page.goto(url, timeout=60000)  # 60 seconds timeout
 
-                    # Wait for the flight cards to load
-                    try:
-                        await page.wait_for_load_state("networkidle", timeout=60000)
-                        await page.wait_for_selector(
-                            "#flightResultContainer", timeout=60000
-                        )  # 30 seconds timeout
-                        await page.wait_for_selector(".flight-card", timeout=5000)
-                    except TimeoutError:
-                        print(f"No flights found for {origin_code} to {dest_code}.")
-                        await page.close()
-                        continue  # Skip to the next pair
+async def _stop_tracing(context: BrowserContext, elapsed: float) -> None:
+    """Keep the Playwright trace of a slow search, drop the others."""
+    try:
+        if elapsed < TRACE_SLOW_SEARCHES:
+            await context.tracing.stop()
+            return
+
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        current = current_span()
+        name = current.trace_id if current else str(int(time.time()))
+        path = os.path.join(TRACE_DIR, f"flights-{name}.zip")
+        await context.tracing.stop(path=path)
+        logger.warning(
+            "Browser fetch took %.1fs; Playwright trace saved to %s", elapsed, path
+        )
+    except Exception as e:
+        logger.warning("Could not stop Playwright tracing: %s", e)
 
-                    flights = await scrape_flights(
-                        page, origin_code, dest_code, departure_date_greg
-                    )
 
-                    all_flights.extend(flights)
+async def _wait_for_writes(writes: List[Awaitable]) -> None:
+    with span("store_flights", batches=len(writes)) as store_span:
+        for write in await asyncio.gather(*writes, return_exceptions=True):
+            if isinstance(write, Exception):
+                store_span.fail("error", write)
+                logger.error("An error occurred while storing flights: %s", write)
 
-                except Exception as e:
-                    print(
-                        f"An error occurred while searching flights from {origin_code} to {dest_code}: {e}"
-                    )
 
-                finally:
-                    await page.close()
+async def _fetch_route_pair_with_timeout(
+    context: BrowserContext,
+    semaphore: asyncio.Semaphore,
+    storage_lock: asyncio.Lock,
+    search: FlightSearchRequest,
+    origin_code: str,
+    dest_code: str,
+) -> Optional[List[Dict]]:
+    """
+    Fetch one route pair, giving up after ROUTE_PAIR_TIMEOUT seconds.
+
+    A pair that times out or fails yields None rather than raising, so the
+    other pairs of the same search are still returned.
+    """
+    with span(
+        "route_pair",
+        origin_code=origin_code,
+        dest_code=dest_code,
+        departure_date=search.departure_date_greg,
+    ) as pair_span:
+        with span("wait_for_slot"):
+            await semaphore.acquire()
+        try:
+            flights = await asyncio.wait_for(
+                _fetch_route_pair(
+                    context, storage_lock, search, origin_code, dest_code
+                ),
+                timeout=ROUTE_PAIR_TIMEOUT,
+            )
+            pair_span.set(flights=len(flights))
+            return flights
+        except asyncio.TimeoutError as e:
+            pair_span.fail("timeout", e)
+            logger.warning(
+                "Timed out after %ss searching flights from %s to %s.",
+                ROUTE_PAIR_TIMEOUT,
+                origin_code,
+                dest_code,
+            )
+        except Exception as e:
+            pair_span.fail("error", e)
+            logger.error(
+                "An error occurred while searching flights from %s to %s: %s",
+                origin_code,
+                dest_code,
+                e,
+            )
+        finally:
+            semaphore.release()
+        return None
+
 
-        await browser.close()
+async def _fetch_route_pair(
+    context: BrowserContext,
+    storage_lock: asyncio.Lock,
+    search: FlightSearchRequest,
+    origin_code: str,
+    dest_code: str,
+) -> List[Dict]:
+    url = search.result_url(origin_code, dest_code)
 
-    # Insert flights into database
-    if all_flights:
-        db = Database()
-        flights_to_insert = [Flight.from_dict(flight) for flight in all_flights]
-        db.insert_flights(flights_to_insert)
-    return all_flights
+    with span("new_page"):
+        page = await context.new_page()
+
+    set_flight_json = f"""
+        () => {{
+            localStorage.setItem("flightJson", `{json.dumps(search.flight_json(origin_code, dest_code))}`);
+        }}
+    """
+
+    try:
+        # Only needed to reach the site's origin for localStorage. robots.txt
+        # is on the origin but does not run the results app, which would
+        # request results with whatever flightJson another pair left there.
+        with span("goto_origin"):
+            await page.goto(
+                ORIGIN_URL, wait_until="domcontentloaded", timeout=60000
+            )  # 60 seconds timeout
+
+        # localStorage is shared by every page of the context, so the
+        # results page must finish loading with our flightJson before
+        # another pair is allowed to overwrite it. Every navigation that
+        # runs the results app happens under the lock.
+        with span("wait_for_storage_lock"):
+            await storage_lock.acquire()
+        try:
+            if FLIGHT_FETCH_ENGINE == "http":
+                HttpFlightFetcher().capture(page, search, origin_code, dest_code)
+            with span("inject_and_reload"):
+                await page.evaluate(set_flight_json)
+                await page.goto(url, timeout=60000)  # 60 seconds timeout
+        finally:
+            storage_lock.release()
+
+        # Wait for the flight cards to load
+        with span("wait_results_container") as wait_span:
+            try:
+                await page.wait_for_selector(
+                    "#flightResultContainer", timeout=60000
+                )  # 60 seconds timeout
+            except TimeoutError as e:
+                wait_span.fail("timeout", e)
+                logger.info("No flights found for %s to %s.", origin_code, dest_code)
+                return []
+
+        with span("wait_flight_cards") as wait_span:
+            if not await wait_for_selector_or_idle(page, ".flight-card", timeout=60000):
+                wait_span.fail("empty")
+                logger.info("No flights found for %s to %s.", origin_code, dest_code)
+                return []
+
+        return await scrape_flights(
+            page,
+            origin_code,
+            dest_code,
+            search.departure_date_greg,
+            return_date_greg=search.arrival_date_greg,
+        )
+
+    finally:
+        await page.close()
 
 
 async def scrape_flights(
-    page: Page, origin_code: str, dest_code: str, departure_date_greg: str
+    page: Page,
+    origin_code: str,
+    dest_code: str,
+    departure_date_greg: str,
+    mode: str = EXTRACTION_MODE,
+    return_date_greg: Optional[str] = None,
 ) -> List[Dict]:
     """
     Scrape flight information from the results page.
@@ -221,9 +667,223 @@ async def scrape_flights(
         page (Page): Playwright page object.
         origin_code (str): Origin airport code.
         dest_code (str): Destination airport code.
+        departure_date_greg (str): Gregorian departure date in 'YYYY-MM-DD' format.
+        mode (str): "batch" to read all cards in a few page evaluations, or
+            "per_card" for the card-by-card path. The batch path falls back to
+            the per-card path when it cannot read every card.
+        return_date_greg (Optional[str]): Gregorian return date of a round
+            trip. The return legs are then scraped from the same cards, as
+            flights from dest_code to origin_code on that date.
 
     Returns:
-        List[Dict]: A list of dictionaries containing flight details.
+        List[Dict]: A list of dictionaries containing flight details. For a
+        round trip each has a "leg" of "outbound" or "return".
+    """
+    with span("scrape", mode=mode) as scrape_span:
+        flights = None
+        if mode == "batch":
+            try:
+                flights = await _scrape_flights_batched(
+                    page, origin_code, dest_code, departure_date_greg, return_date_greg
+                )
+            except Exception as e:
+                logger.warning(
+                    "Batched extraction failed from %s to %s, falling back to per-card extraction: %s",
+                    origin_code,
+                    dest_code,
+                    e,
+                )
+            else:
+                if flights is None:
+                    logger.warning(
+                        "Batched extraction incomplete from %s to %s, falling back to per-card extraction.",
+                        origin_code,
+                        dest_code,
+                    )
+
+        if flights is None:
+            scrape_span.set(mode="per_card", fallback=mode == "batch")
+            flights = await _scrape_flights_per_card(
+                page, origin_code, dest_code, departure_date_greg, return_date_greg
+            )
+
+        scrape_span.set(flights=len(flights))
+        return flights
+
+
+async def _scrape_flights_batched(
+    page: Page,
+    origin_code: str,
+    dest_code: str,
+    departure_date_greg: str,
+    return_date_greg: Optional[str] = None,
+) -> Optional[List[Dict]]:
+    """
+    Scrape all flight cards with a constant number of browser round trips:
+    expand every card's details at once, wait until they have all rendered,
+    then read every field in a single evaluation.
+
+    Returns:
+        Optional[List[Dict]]: The flights, or None if some card's details
+        could not be read and the per-card path should be used instead.
+    """
+    with span("expand_details") as expand_span:
+        expanded = await page.evaluate(EXPAND_DETAILS_JS)
+        expand_span.set(expanded=expanded)
+    if expanded:
+        with span("wait_details") as wait_span:
+            try:
+                await page.wait_for_function(DETAILS_LOADED_JS, timeout=10000)
+            except TimeoutError as e:
+                wait_span.fail("timeout", e)
+                return None
+
+    with span("extract_cards") as extract_span:
+        cards = await page.evaluate(EXTRACT_CARDS_JS)
+        extract_span.set(cards=len(cards))
+
+    flights = []
+    for index, card in enumerate(cards, start=1):
+        legs = [(leg["airline"], leg["departure_time"]) for leg in card["legs"]]
+        if not legs or legs[0][0] is None or legs[0][1] is None:
+            logger.warning(
+                "Failed to scrape flight card %s from %s to %s: missing airline or departure time",
+                index,
+                origin_code,
+                dest_code,
+            )
+            continue
+        if card["has_details_button"] and not card["flight_numbers"]:
+            return None
+
+        flights.extend(
+            _build_leg_flights(
+                index,
+                legs,
+                card["flight_numbers"],
+                origin_code,
+                dest_code,
+                departure_date_greg,
+                return_date_greg,
+            )
+        )
+
+    return _unique_flights(flights) if return_date_greg else flights
+
+
+def _build_leg_flights(
+    index: int,
+    legs: List[Tuple[Optional[str], Optional[str]]],
+    flight_numbers: List[str],
+    origin_code: str,
+    dest_code: str,
+    departure_date_greg: str,
+    return_date_greg: Optional[str],
+) -> List[Dict]:
+    """
+    Flights of one card from its (airline, departure time) legs and flight
+    numbers: the outbound leg, plus the return leg of a round trip.
+    """
+
+    def flight_number(leg: int) -> str:
+        return flight_numbers[leg] if leg < len(flight_numbers) else "N/A"
+
+    airline, departure_time_str = legs[0]
+    outbound = _build_flight_info(
+        index,
+        airline,
+        departure_time_str,
+        flight_number(0),
+        origin_code,
+        dest_code,
+        departure_date_greg,
+    )
+    if not return_date_greg:
+        return [outbound]
+
+    outbound["leg"] = "outbound"
+    if len(legs) < 2 or legs[1][0] is None or legs[1][1] is None:
+        logger.warning("Flight card %s has no return leg from %s.", index, dest_code)
+        return [outbound]
+
+    airline, departure_time_str = legs[1]
+    inbound = _build_flight_info(
+        index,
+        airline,
+        departure_time_str,
+        flight_number(1),
+        dest_code,
+        origin_code,
+        return_date_greg,
+    )
+    inbound["leg"] = "return"
+    return [outbound, inbound]
+
+
+def _unique_flights(flights: List[Dict]) -> List[Dict]:
+    # A round trip lists every outbound and return combination, so each
+    # leg shows up on several cards
+    unique = {}
+    for flight in flights:
+        key = (
+            flight["leg"],
+            flight["flight_number"],
+            flight["departure_datetime"],
+            flight["airline"],
+        )
+        unique.setdefault(key, flight)
+    return list(unique.values())
+
+
+def _build_flight_info(
+    index: int,
+    airline: str,
+    departure_time_str: str,
+    flight_number: str,
+    origin_code: str,
+    dest_code: str,
+    departure_date_greg: str,
+) -> Dict:
+    # Parse departure_time_str into time object
+    try:
+        departure_time = datetime.strptime(departure_time_str, "%H:%M").time()
+    except (TypeError, ValueError):
+        logger.warning(
+            "Invalid departure time format '%s' for flight card %s.",
+            departure_time_str,
+            index,
+        )
+        departure_time = None
+
+    # Combine departure_date_greg and departure_time into datetime object
+    if departure_time:
+        departure_datetime = datetime.strptime(
+            f"{departure_date_greg} {departure_time_str}", "%Y-%m-%d %H:%M"
+        )
+    else:
+        departure_datetime = None  # or handle accordingly
+
+    return {
+        "airline": airline,
+        "departure_datetime": departure_datetime,
+        "flight_number": flight_number,
+        "origin_code": origin_code,
+        "dest_code": dest_code,
+    }
+
+
+async def _scrape_flights_per_card(
+    page: Page,
+    origin_code: str,
+    dest_code: str,
+    departure_date_greg: str,
+    return_date_greg: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Scrape flight information card by card, clicking each card's details
+    button and waiting for its flight number. Slow, but works for any layout
+    the batched path cannot handle. Cards the batched path already expanded
+    are not clicked again, only waited for.
     """
     flights = []
 
@@ -231,73 +891,70 @@ async def scrape_flights(
     flight_cards = await page.query_selector_all(".flight-card")
 
     for index, card in enumerate(flight_cards, start=1):
-        try:
-            # Extract Airline Name
-            airline = await card.eval_on_selector(
-                ".flightInfo .col-3", "el => el.textContent.trim()"
-            )
-
-            # Extract Departure Time
-            departure_time_str = await card.eval_on_selector(
-                ".flightInfo .col-2 b", "el => el.textContent.trim()"
-            )
-
-            # Parse departure_time_str into time object
+        with span("card", index=index) as card_span:
             try:
-                departure_time = datetime.strptime(departure_time_str, "%H:%M").time()
-            except ValueError:
-                print(
-                    f"Invalid departure time format '{departure_time_str}' for flight card {index}."
+                # Extract Airline Name and Departure Time of every leg
+                legs = await card.eval_on_selector_all(
+                    ".flightInfo",
+                    """(infos) => infos.map((info) => {
+                        const text = (selector) => {
+                            const el = info.querySelector(selector);
+                            return el ? el.textContent.trim() : null;
+                        };
+                        return [text(".col-3"), text(".col-2 b")];
+                    })""",
                 )
-                departure_time = None
+                if not legs or legs[0][0] is None or legs[0][1] is None:
+                    raise ValueError("missing airline or departure time")
 
-            # Combine departure_date_greg and departure_time into datetime object
-            if departure_time:
-                departure_datetime = datetime.strptime(
-                    f"{departure_date_greg} {departure_time_str}", "%Y-%m-%d %H:%M"
+                # Click on "جزئیات پرواز" to reveal flight numbers
+                flight_numbers = []
+                details_button = await card.query_selector(
+                    "button:has-text('جزئیات پرواز')"
                 )
-            else:
-                departure_datetime = None  # or handle accordingly
-
-            # Click on "جزئیات پرواز" to reveal flight number
-            details_button = await card.query_selector(
-                "button:has-text('جزئیات پرواز')"
-            )
-            if details_button:
-                await details_button.click()
-                # Wait for the flight-details div to appear
-                try:
-                    await card.wait_for_selector(
-                        ".flight-details", timeout=10000
-                    )  # 10 seconds timeout
-                except TimeoutError:
-                    print(f"Flight details did not load for flight card {index}.")
-                    flight_number = "N/A"
-                else:
-                    # Extract Flight Number
-                    flight_details_el = await card.query_selector(".flight-details")
-                    flight_number = await flight_details_el.eval_on_selector(
-                        "span:has-text('شماره پرواز')",
-                        "el => el.children[0].textContent.trim()",
+                if details_button:
+                    if not await card.evaluate(DETAILS_REQUESTED_JS):
+                        await details_button.click()
+                    # Wait for the flight-details div to appear
+                    try:
+                        await card.wait_for_selector(
+                            ".flight-details", timeout=10000
+                        )  # 10 seconds timeout
+                    except TimeoutError:
+                        card_span.fail("timeout")
+                        logger.warning(
+                            "Flight details did not load for flight card %s.", index
+                        )
+                    else:
+                        # Extract Flight Numbers
+                        flight_details_el = await card.query_selector(".flight-details")
+                        flight_numbers = await flight_details_el.eval_on_selector_all(
+                            "span:has-text('شماره پرواز')",
+                            "els => els.map((el) => el.children[0].textContent.trim())",
+                        )
+
+                # Compile flight information
+                flights.extend(
+                    _build_leg_flights(
+                        index,
+                        legs,
+                        flight_numbers,
+                        origin_code,
+                        dest_code,
+                        departure_date_greg,
+                        return_date_greg,
                     )
-            else:
-                flight_number = "N/A"  # Default if button not found
-
-            # Compile flight information
-            flight_info = {
-                "airline": airline,
-                "departure_datetime": departure_datetime,
-                "flight_number": flight_number,
-                "origin_code": origin_code,
-                "dest_code": dest_code,
-            }
-
-            flights.append(flight_info)
+                )
 
-        except Exception as e:
-            print(
-                f"Failed to scrape flight card {index} from {origin_code} to {dest_code}: {e}"
-            )
-            continue
+            except Exception as e:
+                card_span.fail("error", e)
+                logger.warning(
+                    "Failed to scrape flight card %s from %s to %s: %s",
+                    index,
+                    origin_code,
+                    dest_code,
+                    e,
+                )
+                continue
 
-    return flights
+    return _unique_flights(flights) if return_date_greg else flights
@@ -0,0 +1,385 @@
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote_plus
+
+import httpx
+from playwright.async_api import Page, Response
+
+from agents.browser.loop import add_shutdown_hook
+from agents.flight_team.crawl.search_request import FlightSearchRequest
+
+logger = logging.getLogger(__name__)
+
+# "playwright" renders the results page, "http" replays the results API
+# request directly and falls back to Playwright when that is not possible
+FLIGHT_FETCH_ENGINE = os.getenv("FLIGHT_FETCH_ENGINE", "playwright")
+
+# Results endpoint that accepts the flightJson payload as a JSON POST body.
+# When unset, the endpoint is captured from the first Playwright search.
+FLIGHT_API_URL = os.getenv("FLIGHT_API_URL")
+
+# Substring identifying the results XHR among the requests of the page
+FLIGHT_API_URL_PATTERN = os.getenv("FLIGHT_API_URL_PATTERN", "/flight")
+
+HTTP_TIMEOUT = 30  # seconds
+
+# Keys the results JSON may use for each flight field
+AIRLINE_KEYS = ("airline", "airlineName", "airline_name", "airlineTitle", "carrierName")
+FLIGHT_NUMBER_KEYS = ("flightNumber", "flight_number", "flightNo", "flight_no")
+DEPARTURE_KEYS = (
+    "departureDateTime",
+    "departure_datetime",
+    "departureTime",
+    "departure_time",
+    "departure",
+)
+
+# Request headers that must not be replayed verbatim
+_HOP_BY_HOP_HEADERS = {"content-length", "host", "connection", "accept-encoding"}
+
+
+@dataclass
+class _CapturedRequest:
+    """A results API request recorded from a Playwright search."""
+
+    method: str
+    url: str
+    headers: Dict[str, str]
+    body: Optional[str]
+    # The search the request was recorded for. Its route codes, city names
+    # and dates are substituted when the request is replayed for another
+    # search; the rest of the search must match.
+    search: FlightSearchRequest
+    origin_code: str
+    dest_code: str
+
+    def replay_for(
+        self, search: FlightSearchRequest, origin_code: str, dest_code: str
+    ) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        The URL and body of the request for another search, or None if it
+        cannot be derived from the captured one.
+
+        Only the route codes, city names and dates are known to be
+        replaceable, so a search in another cabin class, for other passengers
+        or of another trip type is not replayed.
+        """
+        captured = self.search
+        if (
+            search.flight_class != captured.flight_class
+            or (search.adults, search.childs, search.infants)
+            != (captured.adults, captured.childs, captured.infants)
+            or search.trip_type != captured.trip_type
+        ):
+            return None
+
+        replacements = {
+            self.origin_code: origin_code,
+            self.dest_code: dest_code,
+            captured.departure_date_greg: search.departure_date_greg,
+        }
+        if captured.arrival_date_greg:
+            replacements[captured.arrival_date_greg] = search.arrival_date_greg
+        # City names are written as in flight_json, and only some requests
+        # carry them
+        cities = {
+            captured.flight_origin.capitalize(): search.flight_origin.capitalize(),
+            captured.flight_dest.capitalize(): search.flight_dest.capitalize(),
+        }
+        # Values the captured request does not carry cannot be replaced, and
+        # replaying it unchanged would return the captured search's flights
+        found = set()
+
+        def replace(value: str) -> str:
+            if value in replacements:
+                found.add(value)
+                return replacements[value]
+            return cities.get(value, value)
+
+        url = _replace_url_values(self.url, replace)
+        body = self.body
+        if body is not None:
+            try:
+                body = json.dumps(_replace_json_values(json.loads(body), replace))
+            except json.JSONDecodeError:
+                body = _replace_url_values(body, replace)
+
+        if found != set(replacements):
+            return None
+        # A captured city name left in some other form, e.g. inside a longer
+        # label, would still search for the captured city. Names the new
+        # search also uses cannot be told apart and are not checked.
+        replayed = f"{unquote_plus(url)}\n{body or ''}".casefold()
+        new_cities = " ".join(cities.values()).casefold()
+        if any(
+            old.casefold() in replayed
+            for old in cities
+            if old.casefold() not in new_cities
+        ):
+            return None
+        return url, body
+
+
+# Field values inside a URL or form body: path segments, query values and the
+# parts of either separated by "-" or "&"
+_URL_VALUE = re.compile(r"[^/?&=\-]+(?:-\d{2}-\d{2})?")
+
+
+def _replace_url_values(text: str, replace: Callable[[str], str]) -> str:
+    return _URL_VALUE.sub(lambda match: replace(match.group(0)), text)
+
+
+def _replace_json_values(data: Any, replace: Callable[[str], str]) -> Any:
+    if isinstance(data, dict):
+        return {
+            key: _replace_json_values(value, replace) for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [_replace_json_values(value, replace) for value in data]
+    if isinstance(data, str):
+        return replace(data)
+    return data
+
+
+class HttpFlightFetcher:
+    """
+    Fetch flight results straight from the results API with a pooled,
+    keep-alive HTTP client instead of rendering the results page.
+
+    The endpoint is either configured with FLIGHT_API_URL, or captured from
+    the results XHR of a Playwright search and replayed for later searches.
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(HttpFlightFetcher, cls).__new__(cls)
+            cls._instance._initialize(*args, **kwargs)
+        return cls._instance
+
+    def _initialize(
+        self,
+        api_url: Optional[str] = FLIGHT_API_URL,
+        url_pattern: str = FLIGHT_API_URL_PATTERN,
+    ):
+        self.api_url = api_url
+        self.url_pattern = url_pattern
+        self._captured: Optional[_CapturedRequest] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether there is an endpoint to send requests to."""
+        return bool(self.api_url) or self._captured is not None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Like the browser pool, the client's connections belong to the loop
+        # that opened them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                http2=importlib.util.find_spec("h2") is not None,
+                timeout=HTTP_TIMEOUT,
+                limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60),
+            )
+        return self._client
+
+    def capture(
+        self, page: Page, search: FlightSearchRequest, origin_code: str, dest_code: str
+    ) -> None:
+        """
+        Record the results API request made by a Playwright results page so
+        later searches can replay it without a browser.
+        """
+        if self._captured is not None or self.api_url:
+            return
+
+        async def on_response(response: Response) -> None:
+            request = response.request
+            if (
+                self._captured is not None
+                or request.resource_type not in ("xhr", "fetch")
+                or self.url_pattern not in request.url
+                or "json" not in response.headers.get("content-type", "")
+            ):
+                return
+
+            try:
+                data = await response.json()
+            except Exception:
+                return
+            if _find_flight_records(data) is None:
+                return
+
+            self._captured = _CapturedRequest(
+                method=request.method,
+                url=request.url,
+                headers={
+                    k: v
+                    for k, v in (await request.all_headers()).items()
+                    if k.lower() not in _HOP_BY_HOP_HEADERS and not k.startswith(":")
+                },
+                body=request.post_data,
+                search=search,
+                origin_code=origin_code,
+                dest_code=dest_code,
+            )
+            logger.info(
+                "Captured flight results API request: %s %s",
+                request.method,
+                request.url,
+            )
+
+        page.on("response", on_response)
+
+    async def fetch(
+        self, search: FlightSearchRequest, origin_code: str, dest_code: str
+    ) -> Optional[List[Dict]]:
+        """
+        Fetch the flights of one route pair.
+
+        Returns:
+            Optional[List[Dict]]: Flights in the same shape as scrape_flights,
+            or None if the API could not be used and the caller should fall
+            back to Playwright.
+        """
+        # The API's layout for return legs is unknown, so round trips are
+        # always scraped from the results page
+        if not self.is_ready or search.arrival_date_greg:
+            return None
+
+        client = self._get_client()
+
+        try:
+            if self.api_url:
+                response = await client.post(
+                    self.api_url, json=search.flight_json(origin_code, dest_code)
+                )
+            else:
+                replay = self._captured.replay_for(search, origin_code, dest_code)
+                if replay is None:
+                    return None
+                url, body = replay
+                response = await client.request(
+                    self._captured.method,
+                    url,
+                    headers=self._captured.headers,
+                    content=body,
+                )
+            response.raise_for_status()
+            data = response.json()
+        except (httpx.HTTPError, json.JSONDecodeError) as e:
+            logger.warning(
+                "Flight API request failed from %s to %s: %s", origin_code, dest_code, e
+            )
+            return None
+
+        records = _find_flight_records(data)
+        if records is None:
+            logger.warning(
+                "Flight API response from %s to %s has no flight list.",
+                origin_code,
+                dest_code,
+            )
+            return None
+
+        return parse_flight_records(
+            records, origin_code, dest_code, search.departure_date_greg
+        )
+
+    async def close(self) -> None:
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+
+add_shutdown_hook(lambda: HttpFlightFetcher().close())
+
+
+def _first_value(record: Dict[str, Any], keys) -> Any:
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _find_flight_records(data: Any) -> Optional[List[Dict]]:
+    """Find the first list of flight-like objects anywhere in the JSON."""
+    if isinstance(data, list):
+        if data and all(isinstance(item, dict) for item in data):
+            if any(_first_value(item, FLIGHT_NUMBER_KEYS) for item in data):
+                return data
+        items = data
+    elif isinstance(data, dict):
+        items = data.values()
+    else:
+        return None
+
+    for item in items:
+        if isinstance(item, (list, dict)):
+            records = _find_flight_records(item)
+            if records is not None:
+                return records
+    return None
+
+
+def parse_flight_records(
+    records: List[Dict], origin_code: str, dest_code: str, departure_date_greg: str
+) -> List[Dict]:
+    """
+    Convert results API flight objects to the dicts produced by scrape_flights.
+    """
+    flights = []
+    for index, record in enumerate(records, start=1):
+        airline = _first_value(record, AIRLINE_KEYS)
+        if isinstance(airline, dict):
+            airline = _first_value(airline, ("name", "title", "nameFa", "nameEn"))
+        departure = _first_value(record, DEPARTURE_KEYS)
+        flight_number = _first_value(record, FLIGHT_NUMBER_KEYS)
+
+        if not airline or not departure:
+            logger.warning(
+                "Skipping flight %s from %s to %s: missing airline or departure time",
+                index,
+                origin_code,
+                dest_code,
+            )
+            continue
+
+        try:
+            departure = str(departure)
+            if len(departure) <= 5:  # "HH:MM"
+                departure_datetime = datetime.strptime(
+                    f"{departure_date_greg} {departure}", "%Y-%m-%d %H:%M"
+                )
+            else:
+                departure_datetime = datetime.fromisoformat(departure[:19])
+        except ValueError:
+            logger.warning(
+                "Invalid departure time format '%s' for flight %s.", departure, index
+            )
+            continue
+
+        flights.append(
+            {
+                "airline": str(airline).strip(),
+                "departure_datetime": departure_datetime,
+                "flight_number": str(flight_number).strip() if flight_number else "N/A",
+                "origin_code": origin_code,
+                "dest_code": dest_code,
+            }
+        )
+
+    return flights
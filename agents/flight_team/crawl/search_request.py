@@ -0,0 +1,79 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# Where results pages are loaded from; pointed at a local copy for benchmarks
+SITE_URL = os.getenv("FLIGHT_SITE_URL", "https://www.tahagasht.com").rstrip("/")
+
+
+@dataclass(frozen=True)
+class FlightSearchRequest:
+    """Validated search parameters shared by every route pair of a search."""
+
+    flight_origin: str
+    flight_dest: str
+    departure_date_greg: str
+    arrival_date_greg: Optional[str]
+    adults: int
+    childs: int
+    infants: int
+    flight_class: str
+
+    @property
+    def trip_type(self) -> str:
+        return "roundtrip" if self.arrival_date_greg else "oneway"
+
+    def flight_json(self, origin_code: str, dest_code: str) -> Dict:
+        return {
+            "passengers": {
+                "adults": self.adults,
+                "childs": self.childs,
+                "infants": self.infants,
+            },
+            "other": {
+                "trip": self.trip_type,
+                "cabin": self.flight_class,
+            },
+            "routes": [
+                {
+                    "from": {
+                        "is_all": True,
+                        "code": origin_code,
+                        "title": self.flight_origin.capitalize(),
+                        "country_code": "",
+                        "country_name": "",
+                        "city_name": self.flight_origin.capitalize(),
+                        "latitude": 0,
+                        "longitude": 0,
+                        "city_fa": "",
+                        "flightMultipleIndex": None,
+                    },
+                    "to": {
+                        "is_all": True,
+                        "code": dest_code,
+                        "title": self.flight_dest.capitalize(),
+                        "country_code": "",
+                        "country_name": "",
+                        "city_name": self.flight_dest.capitalize(),
+                        "latitude": 0,
+                        "longitude": 0,
+                        "city_fa": "",
+                        "flightMultipleIndex": None,
+                    },
+                    "dates": {
+                        "departure": self.departure_date_greg,
+                        "arrival": self.arrival_date_greg
+                        if self.arrival_date_greg
+                        else "",
+                    },
+                }
+            ],
+        }
+
+    def result_url(self, origin_code: str, dest_code: str) -> str:
+        if self.trip_type == "oneway":
+            date_part = self.departure_date_greg
+        else:
+            date_part = f"{self.departure_date_greg}&{self.arrival_date_greg}"
+
+        return f"{SITE_URL}/flights/result/{origin_code}-{dest_code}/{date_part}/{self.trip_type}-{self.flight_class}-{self.adults}-{self.childs}-{self.infants}"
@@ -0,0 +1,132 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger("agents.flight_team.crawl.spans")
+
+# Spans shorter than this are logged at DEBUG instead of INFO
+SPAN_LOG_THRESHOLD = 0.5  # seconds
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    A timed stage of a crawl.
+
+    Spans nest: one started while another is current (in the same task, or
+    in a task created from it) becomes its child and shares its trace_id,
+    so the log lines of one search can be put back together. Every finished
+    span is logged as a JSON object and added to `span_metrics`.
+    """
+
+    def __init__(self, name: str, **attributes: Any):
+        parent = _current_span.get()
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:8]
+        self.parent_id = parent.span_id if parent else None
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def fail(self, status: str, error: Optional[BaseException] = None) -> None:
+        self.status = status
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def end(self) -> None:
+        if self.duration is not None:
+            return
+        self.duration = self.elapsed
+        span_metrics.record(self)
+
+        level = (
+            logging.INFO
+            if self.duration >= SPAN_LOG_THRESHOLD or self.status != "ok"
+            else logging.DEBUG
+        )
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps(self.to_dict(), default=str))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "duration_ms": round((self.duration or self.elapsed) * 1000, 1),
+            "status": self.status,
+            "error": self.error,
+            **self.attributes,
+        }
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Time the enclosed block as a span, current for anything started in it."""
+    current = Span(name, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        if current.status == "ok":
+            current.fail("error", e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+class SpanMetrics:
+    """Count, total and maximum duration and failures per span name."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, span: Span) -> None:
+        with self._lock:
+            metrics = self._metrics.setdefault(
+                span.name, {"count": 0, "total_s": 0.0, "max_s": 0.0, "failures": 0}
+            )
+            metrics["count"] += 1
+            metrics["total_s"] += span.duration
+            metrics["max_s"] = max(metrics["max_s"], span.duration)
+            if span.status != "ok":
+                metrics["failures"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {
+                    **metrics,
+                    "mean_s": metrics["total_s"] / metrics["count"],
+                }
+                for name, metrics in self._metrics.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+
+span_metrics = SpanMetrics()
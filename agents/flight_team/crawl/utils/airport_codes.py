@@ -1,12 +1,219 @@
-from typing import Optional
-import pandas as pd
+import csv
+import difflib
 import os
+import pickle
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
 from agents.flight_team.crawl.exceptions import InvalidAirportCodeError
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 airports_path = os.path.join(current_dir, "airports.csv")
-AIRPORT_DF = pd.read_csv(airports_path)
+# Pre-serialized index, rebuilt whenever airports.csv changes
+index_path = os.path.join(current_dir, "airports_index.pickle")
+
+INDEX_VERSION = 1
+
+# City names for airports listed without one in airports.csv
+IATA_CITY_OVERRIDES = {
+    "AEU": "Abu Musa",
+    "AKW": "Aghajari",
+    "ACZ": "Zabol",
+    "BXR": "Bam",
+    "DEF": "Dezful",
+    "GCH": "Gachsaran",
+    "GSM": "Qeshm",
+    "IAQ": "Bastak",
+    "IHR": "Iranshahr",
+    "JAR": "Jahrom",
+    "JWN": "Zanjan",
+    "JYR": "Jiroft",
+    "KHD": "Khorramabad",
+    "KHK": "Khark Island",
+    "KKS": "Kashan",
+    "KLM": "Kalaleh",
+    "LVP": "Lavan Island",
+    "MRX": "Mahshahr",
+    "NSH": "Noshahr",
+    "PYK": "Karaj",
+    "RJN": "Rafsanjan",
+    "RUD": "Shahroud",
+    "RZR": "Ramsar",
+    "SDG": "Sanandaj",
+    "SXI": "Sirri Island",
+    "SYJ": "Sirjan",
+    "YES": "Yasuj",
+}
+
+# Alternative spellings and Persian names, mapped to the city names used in
+# airports.csv (or IATA_CITY_OVERRIDES)
+CITY_ALIASES = {
+    # English spellings
+    "Kish": "Kish Island",
+    "Esfahan": "Isfahan",
+    "Ahvaz": "Ahwaz",
+    "Arak": "Araak",
+    "Orumiyeh": "Urmia",
+    "Bandar-e Abbas": "Bandar Abbas",
+    "Asaluyeh": "Asaloyeh",
+    "Nowshahr": "Noshahr",
+    "Yasouj": "Yasuj",
+    "Khoram Abad": "Khorramabad",
+    # Iran
+    "تهران": "Tehran",
+    "مشهد": "Mashhad",
+    "کیش": "Kish Island",
+    "جزیره کیش": "Kish Island",
+    "شیراز": "Shiraz",
+    "اصفهان": "Isfahan",
+    "تبریز": "Tabriz",
+    "قشم": "Qeshm",
+    "جزیره قشم": "Qeshm",
+    "اهواز": "Ahwaz",
+    "بندرعباس": "Bandar Abbas",
+    "کرمان": "Kerman",
+    "کرمانشاه": "Kermanshah",
+    "یزد": "Yazd",
+    "رشت": "Rasht",
+    "ساری": "Sari",
+    "زاهدان": "Zahedan",
+    "بوشهر": "Bushehr",
+    "ارومیه": "Urmia",
+    "چابهار": "Chabahar",
+    "گرگان": "Gorgan",
+    "اردبیل": "Ardabil",
+    "همدان": "Hamadan",
+    "آبادان": "Abadan",
+    "عسلویه": "Asaloyeh",
+    "بیرجند": "Birjand",
+    "سنندج": "Sanandaj",
+    "خرم آباد": "Khorramabad",
+    "زنجان": "Zanjan",
+    "دزفول": "Dezful",
+    "بندر لنگه": "Bandar Lengeh",
+    "ایلام": "Ilam",
+    "شهرکرد": "Shahrekord",
+    "اراک": "Araak",
+    "قزوین": "Qazvin",
+    "سمنان": "Semnan",
+    "بجنورد": "Bojnord",
+    "سبزوار": "Sabzevar",
+    "طبس": "Tabas",
+    "لار": "Lar",
+    "لامرد": "Lamerd",
+    "جهرم": "Jahrom",
+    "یاسوج": "Yasuj",
+    "خوی": "Khoy",
+    "نوشهر": "Noshahr",
+    "رامسر": "Ramsar",
+    "سیرجان": "Sirjan",
+    "رفسنجان": "Rafsanjan",
+    "بم": "Bam",
+    "جیرفت": "Jiroft",
+    "زابل": "Zabol",
+    "ایرانشهر": "Iranshahr",
+    "شاهرود": "Shahroud",
+    "کاشان": "Kashan",
+    # Common international destinations
+    "استانبول": "Istanbul",
+    "دبی": "Dubai",
+    "نجف": "Najaf",
+    "بغداد": "Baghdad",
+    "دوحه": "Doha",
+    "مسکو": "Moscow",
+    "تفلیس": "Tbilisi",
+    "ایروان": "Yerevan",
+    "باکو": "Baku",
+    "آنتالیا": "Antalya",
+    "بانکوک": "Bangkok",
+    "کوالالامپور": "Kuala Lumpur",
+}
+
+# Arabic code points that are written differently in Persian text
+_PERSIAN_CHAR_MAP = str.maketrans(
+    {
+        "ي": "ی",
+        "ى": "ی",
+        "ك": "ک",
+        "ة": "ه",
+        "ۀ": "ه",
+        "ـ": None,  # tatweel
+    }
+)
+# Spaces, ZWNJ, hyphens and punctuation are ignored when matching names
+_IGNORED_CHARS = re.compile(r"[\s\u200c\u200f\-_'.,()]+")
+_AIRPORT_SUFFIX = re.compile(r"\s+(International\s+)?(Airport|Air\s+Base)$")
+
+
+def normalize_city_name(name: str) -> str:
+    """
+    Normalize a city name for lookups: case-insensitive, without diacritics,
+    Arabic/Persian letter variants unified, spaces and punctuation removed.
+    """
+    name = unicodedata.normalize("NFKD", name.translate(_PERSIAN_CHAR_MAP))
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return _IGNORED_CHARS.sub("", name.casefold())
+
+
+# city key -> [(iata, country), ...], iata -> city
+_AirportIndex = Tuple[Dict[str, List[Tuple[str, str]]], Dict[str, str]]
+
+
+def _build_index() -> _AirportIndex:
+    city_airports: Dict[str, List[Tuple[str, str]]] = {}
+    iata_city: Dict[str, str] = {}
+
+    with open(airports_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            iata = row["iata"].strip()
+            if not iata:
+                continue
+
+            city = (
+                row["city"].strip()
+                or IATA_CITY_OVERRIDES.get(iata)
+                or _AIRPORT_SUFFIX.sub("", row["name"].strip())
+            )
+            iata_city.setdefault(iata, city)
+            city_airports.setdefault(normalize_city_name(city), []).append(
+                (iata, row["country"].strip())
+            )
+
+    for alias, city in CITY_ALIASES.items():
+        airports = city_airports.get(normalize_city_name(city))
+        if airports:
+            city_airports.setdefault(normalize_city_name(alias), airports)
+
+    return city_airports, iata_city
+
+
+def _csv_signature() -> Tuple[int, float, int]:
+    stat = os.stat(airports_path)
+    return INDEX_VERSION, stat.st_mtime, stat.st_size
+
+
+@lru_cache(maxsize=None)
+def _get_index() -> _AirportIndex:
+    """Load the pre-serialized index, rebuilding it if it is missing or stale."""
+    signature = _csv_signature()
+
+    try:
+        with open(index_path, "rb") as f:
+            stored_signature, index = pickle.load(f)
+        if stored_signature == signature:
+            return index
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        pass
+
+    index = _build_index()
+    try:
+        with open(index_path, "wb") as f:
+            pickle.dump((signature, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass  # Read-only install; the in-memory index is enough
+    return index
 
 
 def get_city_name(airport_code: str) -> str:
@@ -19,35 +226,41 @@ def get_city_name(airport_code: str) -> str:
     Returns:
         City name
     """
-    city = AIRPORT_DF[AIRPORT_DF["iata"] == airport_code]
+    _, iata_city = _get_index()
+    city = iata_city.get(airport_code.strip().upper())
 
-    if city.empty:
+    if city is None:
         raise InvalidAirportCodeError(f"No city found for {airport_code}")
 
-    return city["city"].values[0]
+    return city
 
 
-def get_airport_code(city_name: str, country_name: Optional[str] = None) -> str:
+def get_airport_code(city_name: str, country_name: Optional[str] = None) -> List[str]:
     """
-    Get airport code based on city and country names
+    Get airport codes based on city and country names
 
     Args:
-        city_name: Name of the city
-        country_name: Name of the country
+        city_name: Name of the city, in English or Persian
+        country_name: Country code of the city (e.g. "IR")
 
     Returns:
-        Airport code
+        Airport codes
     """
+    city_airports, _ = _get_index()
+    key = normalize_city_name(city_name)
+    airports = city_airports.get(key, [])
+
     if country_name:
-        airport = AIRPORT_DF[
-            (AIRPORT_DF["city"] == city_name) & (AIRPORT_DF["country"] == country_name)
-        ]
-    else:
-        airport = AIRPORT_DF[AIRPORT_DF["city"] == city_name]
-
-    if airport.empty:
-        raise InvalidAirportCodeError(
-            f"No airport found for {city_name}, {country_name}"
-        )
-
-    return airport["iata"].values.tolist()
+        country = country_name.strip().upper()
+        airports = [airport for airport in airports if airport[1].upper() == country]
+
+    if not airports:
+        message = f"No airport found for {city_name}, {country_name}"
+        suggestions = difflib.get_close_matches(key, city_airports.keys(), n=3)
+        if suggestions:
+            _, iata_city = _get_index()
+            names = sorted({iata_city[city_airports[s][0][0]] for s in suggestions})
+            message += f". Did you mean: {', '.join(names)}?"
+        raise InvalidAirportCodeError(message)
+
+    return [iata for iata, _ in airports]
@@ -25,5 +25,5 @@ def convert_to_gregorian(date_str: str) -> str:
         else:
             datetime.strptime(date_str, "%Y-%m-%d")
             return date_str
-    except (ValueError, jdatetime.errors.JDValueError) as e:
+    except ValueError as e:
         raise DateConversionError(f"Failed to convert date '{date_str}': {e}")
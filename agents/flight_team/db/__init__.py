@@ -1,3 +1,5 @@
 from agents.flight_team.db.database import Database, Flight
+from agents.flight_team.db.query import FlightQuery
+from agents.flight_team.db.writer import FlightWriter
 
-__all__ = ["Database", "Flight"]
+__all__ = ["Database", "Flight", "FlightQuery", "FlightWriter"]
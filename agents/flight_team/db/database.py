@@ -1,9 +1,37 @@
+import os
 import sqlite3
-from contextlib import contextmanager
-from datetime import datetime
-from typing import Any, Dict, List
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Sequence
 
+from agents.db import ConnectionManager
 from agents.flight_team.db.models import Flight
+from agents.flight_team.db.query import FlightQuery
+
+DEFAULT_DB_PATH = "flights.db"
+
+# Applied to every file-backed connection. WAL lets readers keep reading
+# while a crawl is writing; NORMAL sync is safe under WAL and only risks the
+# last commits on power loss, which a re-crawl restores anyway.
+SQLITE_PRAGMAS = {
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # KiB when < 0
+    "temp_store": "MEMORY",
+}
+
+# Stored in PRAGMA user_version; see Database._migrate
+SCHEMA_VERSION = 2
+
+# Columns identifying one flight; a crawl that finds it again updates its row.
+# The airline is part of it because scraped cards without a flight number
+# all read "N/A"
+NATURAL_KEY = "flight_number, departure_datetime, origin_code, dest_code, airline"
+
+# Rows query_flights returns at most, so a broad query cannot pull the whole
+# table into the model's context
+QUERY_ROW_LIMIT = int(os.getenv("FLIGHT_QUERY_ROW_LIMIT", "200"))
 
 
 class Database:
@@ -15,14 +43,18 @@ class Database:
             cls._instance._initialize(*args, **kwargs)
         return cls._instance
 
-    def _initialize(self, in_memory: bool = False):
-        """Initialize the database connection and tables"""
-        if in_memory:
-            self.conn = sqlite3.connect(":memory:", check_same_thread=False)
-        else:
-            self.conn = sqlite3.connect("flights.db", check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
+    def _initialize(self, in_memory: bool = False, path: str = DEFAULT_DB_PATH):
+        """Initialize the database connections and tables"""
+        self.connections = ConnectionManager(
+            path, in_memory=in_memory, pragmas=SQLITE_PRAGMAS
+        )
         self._create_tables()
+        self._migrate()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The writer connection"""
+        return self.connections.writer
 
     def _create_tables(self):
         with self._get_cursor() as cursor:
@@ -39,29 +71,74 @@ class Database:
                 )
             """)
 
-    @contextmanager
+    def _migrate(self):
+        """Bring an existing flights table up to SCHEMA_VERSION"""
+        with self._get_cursor() as cursor:
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+
+            if version < 1:
+                # Keep only the newest snapshot of each flight so that the
+                # natural key can be made unique
+                cursor.execute(f"""
+                    DELETE FROM flights WHERE rowid NOT IN (
+                        SELECT MAX(rowid) FROM flights GROUP BY {NATURAL_KEY}
+                    )
+                """)
+                # Covering indexes for route + date lookups by airport code
+                # and by city name, so matching rows are read from the index
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_flights_code_route_date
+                    ON flights (
+                        origin_code, dest_code, departure_datetime,
+                        airline, flight_number, origin_city, dest_city, created_at
+                    )
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_flights_city_route_date
+                    ON flights (
+                        origin_city, dest_city, departure_datetime,
+                        airline, flight_number, origin_code, dest_code, created_at
+                    )
+                """)
+
+            if version < 2:
+                # Version 1 keyed flights without their airline, which merged
+                # flights of different airlines whose number was not scraped
+                # ("N/A") and that left at the same time
+                cursor.execute("DROP INDEX IF EXISTS idx_flights_natural_key")
+                cursor.execute(f"""
+                    CREATE UNIQUE INDEX idx_flights_natural_key
+                    ON flights ({NATURAL_KEY})
+                """)
+
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
     def _get_cursor(self):
-        cursor = self.conn.cursor()
-        try:
-            yield cursor
-            self.conn.commit()
-        except Exception as e:
-            self.conn.rollback()
-            raise e
-        finally:
-            cursor.close()
+        """Cursor for writes, serialized with all other writes"""
+        return self.connections.write()
+
+    def _read_cursor(self):
+        """Cursor for reads on this thread's read-only connection"""
+        return self.connections.read()
 
     def insert_flights(self, flights: List[Flight]):
         """
-        Insert a list of Flight objects into the database
+        Insert a list of Flight objects into the database. A flight that is
+        already stored (same flight number, departure, route and airline) is
+        updated in place and its created_at refreshed.
         """
         with self._get_cursor() as cursor:
             cursor.executemany(
-                """
+                f"""
                 INSERT INTO flights (
                     airline, departure_datetime, flight_number, 
                     origin_city, origin_code, dest_city, dest_code, created_at
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT ({NATURAL_KEY})
+                DO UPDATE SET
+                    origin_city = excluded.origin_city,
+                    dest_city = excluded.dest_city,
+                    created_at = excluded.created_at
                 """,
                 [
                     (
@@ -78,36 +155,61 @@ class Database:
                 ],
             )
 
-    def query_flights(self, query: str) -> List[Dict[str, Any]]:
+    def iter_flights(
+        self, query: str, params: Sequence[Any] = ()
+    ) -> Iterator[Dict[str, Any]]:
         """
-        Query flights based on the given query
+        Lazily yield the rows of a query as dicts of the stored values
         """
-        try:
-            with self._get_cursor() as cursor:
-                cursor.execute(
-                    query,
-                )
+        with self._read_cursor() as cursor:
+            cursor.execute(query, params)
+            for row in cursor:
+                yield dict(row)
+
+    def query_flights(
+        self, query: str, max_rows: Optional[int] = QUERY_ROW_LIMIT
+    ) -> List[Dict[str, Any]]:
+        """
+        Query flights based on the given query, returning at most max_rows
+        rows (all of them when None)
+        """
+        with closing(self.iter_flights(query)) as rows:
+            return list(islice(rows, max_rows))
+
+    def find_flights(self, query: FlightQuery) -> List[Dict[str, Any]]:
+        """
+        Flights matching a structured query, as one indexed lookup
+        """
+        sql, params = query.compile()
+        with closing(self.iter_flights(sql, params)) as rows:
+            return list(rows)
+
+    def last_updated(
+        self, origin_code: str, dest_code: str, departure_date: date
+    ) -> Optional[datetime]:
+        """
+        When flights of a route departing on the given date were last stored,
+        or None if there are none
+        """
+        with self._read_cursor() as cursor:
+            row = cursor.execute(
+                """
+                SELECT MAX(created_at) FROM flights
+                WHERE origin_code = ? AND dest_code = ?
+                AND departure_datetime >= ? AND departure_datetime < ?
+                """,
+                (
+                    origin_code,
+                    dest_code,
+                    departure_date.isoformat(),
+                    (departure_date + timedelta(days=1)).isoformat(),
+                ),
+            ).fetchone()
 
-                results = cursor.fetchall()
-                return [
-                    Flight(
-                        airline=row["airline"],
-                        departure_datetime=datetime.fromisoformat(
-                            row["departure_datetime"]
-                        ),
-                        flight_number=row["flight_number"],
-                        origin_city=row["origin_city"],
-                        origin_code=row["origin_code"],
-                        dest_city=row["dest_city"],
-                        dest_code=row["dest_code"],
-                    ).to_dict()
-                    for row in results
-                ]
-        except Exception as e:
-            raise e
+        return datetime.fromisoformat(row[0]) if row[0] else None
 
     def close(self):
         """
-        Close the database connection
+        Close the database connections
         """
-        self.conn.close()
+        self.connections.close()
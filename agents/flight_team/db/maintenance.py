@@ -0,0 +1,177 @@
+"""
+Retention and compaction for the flights store.
+
+    python -m agents.flight_team.db.maintenance             # run once
+    python -m agents.flight_team.db.maintenance --every 24  # every 24 hours
+"""
+
+import argparse
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from agents.flight_team.db.database import DEFAULT_DB_PATH, NATURAL_KEY, Database
+
+logger = logging.getLogger(__name__)
+
+# Hours between two scheduled runs; 0 disables the schedule
+MAINTENANCE_INTERVAL = float(os.getenv("FLIGHT_MAINTENANCE_INTERVAL_HOURS", "24"))
+
+
+@dataclass
+class MaintenanceReport:
+    departed_removed: int = 0
+    duplicates_removed: int = 0
+    size_before: int = 0  # bytes of database pages, WAL excluded
+    size_after: int = 0  # bytes
+    wal_before: int = 0  # bytes of the -wal file
+    wal_after: int = 0  # bytes
+
+    @property
+    def rows_removed(self) -> int:
+        return self.departed_removed + self.duplicates_removed
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return self.size_before - self.size_after
+
+    def __str__(self) -> str:
+        return (
+            f"Removed {self.rows_removed:,} rows ({self.departed_removed:,} departed, "
+            f"{self.duplicates_removed:,} duplicate), "
+            f"reclaimed {self.bytes_reclaimed / 1024:,.1f} KiB, "
+            f"WAL {self.wal_before / 1024:,.1f} -> {self.wal_after / 1024:,.1f} KiB"
+        )
+
+
+def _database_size(db: Database) -> int:
+    """Bytes of the database's pages, whether still in the WAL or not."""
+    with db._read_cursor() as cursor:
+        page_count = cursor.execute("PRAGMA page_count").fetchone()[0]
+        page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+
+def _wal_size(db: Database) -> int:
+    wal_path = f"{db.connections.path}-wal"
+    return os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+
+
+def run_maintenance(
+    db: Optional[Database] = None, now: Optional[datetime] = None
+) -> MaintenanceReport:
+    """
+    Purge departed flights, collapse duplicate snapshots of a flight (same
+    natural key) to the newest one, then give the freed pages back to the
+    file system and refresh the query planner statistics.
+
+    Flights a later crawl did not see are kept until they depart: a crawl
+    that times out or was filtered can miss flights that still exist.
+    """
+    db = db or Database()
+    now = now or datetime.now()
+    report = MaintenanceReport(size_before=_database_size(db), wal_before=_wal_size(db))
+
+    with db._get_cursor() as cursor:
+        report.departed_removed = cursor.execute(
+            "DELETE FROM flights WHERE departure_datetime < ?",
+            (now.isoformat(timespec="seconds"),),
+        ).rowcount
+
+        # The natural key keeps new duplicates out; this catches any written
+        # before it existed
+        report.duplicates_removed = cursor.execute(f"""
+            DELETE FROM flights WHERE rowid NOT IN (
+                SELECT MAX(rowid) FROM flights GROUP BY {NATURAL_KEY}
+            )
+        """).rowcount
+
+    with db._get_cursor() as cursor:
+        if not db.connections.in_memory:
+            if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                # The pragma frees one page per step and execute() stops after
+                # the first; executescript() runs it to the end
+                cursor.executescript("PRAGMA incremental_vacuum;")
+            else:
+                # Files created before auto_vacuum was enabled need one full
+                # VACUUM to switch over; later runs are incremental
+                cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                cursor.execute("VACUUM")
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # Measured after the checkpoint, which only moves pages out of the WAL,
+    # and before ANALYZE adds its statistics table
+    report.size_after = _database_size(db)
+    report.wal_after = _wal_size(db)
+
+    with db._get_cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return report
+
+
+class MaintenanceScheduler:
+    """Runs `run_maintenance` every `interval` hours on a daemon thread."""
+
+    def __init__(self, interval: float = MAINTENANCE_INTERVAL):
+        self.interval = interval
+        self.last_report: Optional[MaintenanceReport] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="flight-maintenance", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Block until the scheduler is stopped (or `timeout` seconds pass)."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval * 3600):
+            try:
+                self.last_report = run_maintenance()
+                logger.info("Flights database maintenance: %s", self.last_report)
+            except Exception:
+                logger.exception(
+                    "An error occurred during flights database maintenance"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Purge departed flights and compact the flights database."
+    )
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="database file")
+    parser.add_argument(
+        "--every",
+        type=float,
+        default=0,
+        help="keep running, every this many hours (default: run once)",
+    )
+    args = parser.parse_args()
+
+    db = Database(path=args.db)
+    print(run_maintenance(db))
+
+    if args.every > 0:
+        scheduler = MaintenanceScheduler(args.every)
+        scheduler.start()
+        try:
+            scheduler.join()
+        except KeyboardInterrupt:
+            scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from agents.flight_team.crawl.exceptions import DateConversionError
+from agents.flight_team.crawl.utils.airport_codes import get_airport_code
+from agents.flight_team.crawl.utils.date import convert_to_gregorian
+
+MAX_QUERY_LIMIT = 200
+
+# Columns returned for every flight, in order
+FLIGHT_COLUMNS = (
+    "airline",
+    "departure_datetime",
+    "flight_number",
+    "origin_city",
+    "origin_code",
+    "dest_city",
+    "dest_code",
+    "created_at",
+)
+
+# (origin code count, dest code count, filter on airline, filter on earliest
+# time, filter on latest time, time window wraps past midnight, sort column,
+# descending)
+_QueryShape = Tuple[int, int, bool, bool, bool, bool, str, bool]
+
+
+class FlightQuery(BaseModel):
+    origin: str = Field(
+        description="Departure city in English or Persian (e.g. 'Tehran'), or its IATA code"
+    )
+    destination: str = Field(
+        description="Arrival city in English or Persian (e.g. 'Mashhad'), or its IATA code"
+    )
+    date_from: str = Field(
+        description="First departure date, YYYY-MM-DD in the Gregorian or Jalali calendar"
+    )
+    date_to: Optional[str] = Field(
+        default=None,
+        description="Last departure date (inclusive), same format; defaults to date_from",
+    )
+    airline: Optional[str] = Field(
+        default=None, description="Only flights of this airline (e.g. 'Iran Air')"
+    )
+    departure_after: Optional[str] = Field(
+        default=None,
+        description="Earliest departure time of day, HH:MM",
+        pattern=r"^([01]\d|2[0-3]):[0-5]\d$",
+    )
+    departure_before: Optional[str] = Field(
+        default=None,
+        description=(
+            "Latest departure time of day, HH:MM; earlier than departure_after "
+            "for a window past midnight (e.g. 22:00 to 06:00)"
+        ),
+        pattern=r"^([01]\d|2[0-3]):[0-5]\d$",
+    )
+    sort_by: Literal["departure_datetime", "airline"] = Field(
+        default="departure_datetime", description="Column to sort the flights by"
+    )
+    descending: bool = Field(default=False, description="Sort in descending order")
+    limit: int = Field(
+        default=50, ge=1, le=MAX_QUERY_LIMIT, description="Maximum number of flights"
+    )
+
+    @field_validator("date_from", "date_to")
+    @classmethod
+    def _to_gregorian(cls, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        # A ValueError lets pydantic report it as a ValidationError
+        try:
+            return convert_to_gregorian(value.strip())
+        except DateConversionError as e:
+            raise ValueError(str(e)) from e
+
+    @model_validator(mode="after")
+    def _check_date_range(self) -> "FlightQuery":
+        if self.date_to is not None and self.date_to < self.date_from:
+            raise ValueError("date_to must not be before date_from")
+        return self
+
+    def compile(self) -> Tuple[str, List[str]]:
+        """
+        The parameterized SQL for this query and its parameters.
+
+        Cities are resolved to airport codes so the lookup always runs on
+        the (origin_code, dest_code, departure_datetime) covering index, and
+        queries of the same shape share one SQL text, so SQLite's statement
+        cache prepares it only once per connection.
+        """
+        origin_codes = _airport_codes(self.origin)
+        dest_codes = _airport_codes(self.destination)
+        last_date = date.fromisoformat(self.date_to or self.date_from)
+
+        params = [
+            *origin_codes,
+            *dest_codes,
+            self.date_from,
+            (last_date + timedelta(days=1)).isoformat(),
+        ]
+        if self.airline:
+            params.append(self.airline.strip())
+        if self.departure_after:
+            params.append(self.departure_after)
+        if self.departure_before:
+            params.append(self.departure_before)
+        params.append(self.limit)
+
+        sql = _compile_sql(
+            (
+                len(origin_codes),
+                len(dest_codes),
+                bool(self.airline),
+                bool(self.departure_after),
+                bool(self.departure_before),
+                bool(
+                    self.departure_after
+                    and self.departure_before
+                    and self.departure_after > self.departure_before
+                ),
+                self.sort_by,
+                self.descending,
+            )
+        )
+        return sql, params
+
+
+def _airport_codes(place: str) -> List[str]:
+    place = place.strip()
+    if len(place) == 3 and place.isascii() and place.isupper():
+        return [place]
+    return get_airport_code(place)
+
+
+def _placeholders(count: int) -> str:
+    return ", ".join("?" * count)
+
+
+@lru_cache(maxsize=128)
+def _compile_sql(shape: _QueryShape) -> str:
+    (
+        origin_count,
+        dest_count,
+        by_airline,
+        after,
+        before,
+        overnight,
+        sort_by,
+        descending,
+    ) = shape
+
+    conditions = [
+        f"origin_code IN ({_placeholders(origin_count)})",
+        f"dest_code IN ({_placeholders(dest_count)})",
+        "departure_datetime >= ?",
+        "departure_datetime < ?",
+    ]
+    if by_airline:
+        conditions.append("airline = ? COLLATE NOCASE")
+    # departure_datetime is stored as ISO 8601, so HH:MM starts at offset 12
+    if overnight:
+        conditions.append(
+            "(substr(departure_datetime, 12, 5) >= ? "
+            "OR substr(departure_datetime, 12, 5) <= ?)"
+        )
+    else:
+        if after:
+            conditions.append("substr(departure_datetime, 12, 5) >= ?")
+        if before:
+            conditions.append("substr(departure_datetime, 12, 5) <= ?")
+
+    direction = "DESC" if descending else "ASC"
+    order = f"{sort_by} {direction}"
+    if sort_by != "departure_datetime":
+        order += ", departure_datetime"
+
+    return (
+        f"SELECT {', '.join(FLIGHT_COLUMNS)} FROM flights "
+        f"WHERE {' AND '.join(conditions)} "
+        f"ORDER BY {order} LIMIT ?"
+    )
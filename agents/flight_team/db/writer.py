@@ -0,0 +1,129 @@
+import asyncio
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from agents.flight_team.db.database import Database
+from agents.flight_team.db.models import Flight
+
+logger = logging.getLogger(__name__)
+
+# How long the writer waits for more flights before committing a batch
+WRITE_BATCH_DELAY = 0.05  # seconds
+# Flights committed in one transaction at most
+WRITE_BATCH_MAX_FLIGHTS = 2000
+FLUSH_TIMEOUT = 30  # seconds
+
+_Submission = Tuple[List[Dict], Future]
+
+
+class FlightWriter:
+    """
+    Stores crawled flights from a background thread.
+
+    Crawlers hand over the flight dicts of each route pair as soon as it is
+    scraped and carry on fetching; the writer thread turns them into
+    `Flight`s (airport lookups included) and upserts everything submitted
+    within WRITE_BATCH_DELAY in one transaction, so the event loop never
+    waits on SQLite.
+    """
+
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(FlightWriter, cls).__new__(cls)
+            cls._instance._initialize(*args, **kwargs)
+        return cls._instance
+
+    def _initialize(
+        self,
+        batch_delay: float = WRITE_BATCH_DELAY,
+        batch_max_flights: int = WRITE_BATCH_MAX_FLIGHTS,
+    ):
+        self.batch_delay = batch_delay
+        self.batch_max_flights = batch_max_flights
+        self.batches = 0
+        self.flights_written = 0
+
+        self._queue: "queue.Queue[_Submission]" = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="flight-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, flights: List[Dict]) -> "Future[int]":
+        """
+        Queue flight dicts (as returned by `search_flights`) for storage.
+
+        The returned future resolves to the number of flights stored once
+        they are committed.
+        """
+        future: "Future[int]" = Future()
+        self._queue.put((list(flights), future))
+        return future
+
+    async def write(self, flights: List[Dict]) -> int:
+        """Store flight dicts without blocking the running event loop."""
+        return await asyncio.wrap_future(self.submit(flights))
+
+    def flush(self, timeout: Optional[float] = FLUSH_TIMEOUT) -> None:
+        """Block until everything submitted so far is committed."""
+        try:
+            self.submit([]).result(timeout=timeout)
+        except Exception as e:
+            logger.error("Pending flights were not all stored: %s", e)
+
+    def _next_batch(self) -> List[_Submission]:
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.batch_delay
+
+        while size < self.batch_max_flights:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                submission = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(submission)
+            size += len(submission[0])
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                self._write([flight for flights, _ in batch for flight in flights])
+            except Exception:
+                # Retry one submission at a time so a bad one only fails itself
+                for flights, future in batch:
+                    try:
+                        future.set_result(self._write(flights))
+                    except Exception as e:
+                        future.set_exception(e)
+            else:
+                for flights, future in batch:
+                    future.set_result(len(flights))
+
+    def _write(self, flights: List[Dict]) -> int:
+        if not flights:
+            return 0
+        Database().insert_flights([Flight.from_dict(flight) for flight in flights])
+        self.batches += 1
+        self.flights_written += len(flights)
+        return len(flights)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "flights_written": self.flights_written,
+        }
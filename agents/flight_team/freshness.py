@@ -0,0 +1,231 @@
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from agents.browser.loop import submit
+from agents.flight_team.crawl.cache import cached_search_flights
+from agents.flight_team.crawl.utils.airport_codes import get_city_name
+from agents.flight_team.db import Database, FlightQuery
+
+logger = logging.getLogger(__name__)
+
+# Stored flights younger than this are served as they are
+FRESH_MAX_AGE = timedelta(minutes=int(os.getenv("FLIGHT_FRESH_MAX_AGE_MINUTES", "30")))
+# Older ones are still served up to this age while the route is re-crawled in
+# the background; past it they are dropped and a live search takes over
+STALE_MAX_AGE = timedelta(hours=int(os.getenv("FLIGHT_STALE_MAX_AGE_HOURS", "6")))
+
+
+def _parse_route_max_ages(
+    value: str,
+) -> Dict[Tuple[str, str], Tuple[timedelta, timedelta]]:
+    """
+    Parse comma-separated "ORIGIN-DEST=fresh:stale" entries, ages in minutes
+    (e.g. "THR-KIH=10:120,IKA-IST=60:720").
+    """
+    max_ages = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        try:
+            route, ages = entry.split("=")
+            origin_code, dest_code = route.split("-")
+            fresh, stale = (timedelta(minutes=float(age)) for age in ages.split(":"))
+            if stale < fresh:
+                raise ValueError
+        except ValueError:
+            raise ValueError(
+                f"Invalid FLIGHT_ROUTE_MAX_AGES entry '{entry.strip()}'; expected "
+                "ORIGIN-DEST=fresh_minutes:stale_minutes, stale not below fresh"
+            )
+        max_ages[(origin_code.strip().upper(), dest_code.strip().upper())] = (
+            fresh,
+            stale,
+        )
+    return max_ages
+
+
+# (origin_code, dest_code) -> (fresh max age, stale max age), for routes whose
+# schedules change faster or slower than usual
+ROUTE_MAX_AGES = _parse_route_max_ages(os.getenv("FLIGHT_ROUTE_MAX_AGES", ""))
+
+RouteDate = Tuple[str, str, date]
+
+
+class Freshness(str, Enum):
+    FRESH = "fresh"
+    STALE = "stale"
+    EXPIRED = "expired"
+
+
+class FreshnessPolicy:
+    """How long stored flights of a route can be served."""
+
+    def __init__(
+        self,
+        fresh_max_age: timedelta = FRESH_MAX_AGE,
+        stale_max_age: timedelta = STALE_MAX_AGE,
+        route_max_ages: Optional[
+            Dict[Tuple[str, str], Tuple[timedelta, timedelta]]
+        ] = None,
+    ):
+        self.fresh_max_age = fresh_max_age
+        self.stale_max_age = stale_max_age
+        self.route_max_ages = (
+            ROUTE_MAX_AGES if route_max_ages is None else route_max_ages
+        )
+
+    def max_ages(self, origin_code: str, dest_code: str) -> Tuple[timedelta, timedelta]:
+        return self.route_max_ages.get(
+            (origin_code, dest_code), (self.fresh_max_age, self.stale_max_age)
+        )
+
+    def classify(
+        self,
+        origin_code: str,
+        dest_code: str,
+        updated_at: Optional[datetime],
+        now: Optional[datetime] = None,
+    ) -> Freshness:
+        if updated_at is None:
+            return Freshness.EXPIRED
+
+        fresh_max_age, stale_max_age = self.max_ages(origin_code, dest_code)
+        age = (now or datetime.now()) - updated_at
+        if age <= fresh_max_age:
+            return Freshness.FRESH
+        if age <= stale_max_age:
+            return Freshness.STALE
+        return Freshness.EXPIRED
+
+
+class FreshFlightLookup:
+    """
+    Stale-while-revalidate on top of `Database`.
+
+    Rows from the flights table are grouped by route and departure date and
+    judged by when that route and date were last crawled. Fresh rows are
+    returned as they are, stale rows are returned too while the route is
+    re-crawled on the crawler loop, and expired rows are dropped so the
+    caller falls back to a live search. Each route and date is refreshed at
+    most once at a time.
+    """
+
+    def __init__(self, policy: Optional[FreshnessPolicy] = None):
+        self.policy = policy or FreshnessPolicy()
+        self.refreshes = 0
+
+        self._refreshing: Set[RouteDate] = set()
+        self._lock = threading.Lock()
+
+    def find(self, query: FlightQuery) -> List[Dict[str, Any]]:
+        """Run a structured query on the flights database and keep the usable rows."""
+        return self.apply(Database().find_flights(query))
+
+    def apply(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        groups: Dict[RouteDate, List[Dict[str, Any]]] = {}
+        results = []
+        for row in rows:
+            key = _route_date(row)
+            if key is None:
+                # Aggregates and partial selects cannot be judged; keep them
+                results.append(row)
+            else:
+                groups.setdefault(key, []).append(row)
+
+        db = Database()
+        now = datetime.now()
+        for key, group in groups.items():
+            origin_code, dest_code, departure_date = key
+            updated_at = db.last_updated(origin_code, dest_code, departure_date)
+            freshness = self.policy.classify(origin_code, dest_code, updated_at, now)
+
+            if freshness is Freshness.EXPIRED:
+                continue
+            if freshness is Freshness.STALE:
+                self.refresh(key)
+            for row in group:
+                row["last_updated"] = updated_at.isoformat()
+            results.extend(group)
+
+        return results
+
+    def refresh(self, key: RouteDate) -> bool:
+        """
+        Re-crawl a route and date in the background, unless it already is
+        being re-crawled or has departed. Returns whether a refresh started;
+        a refresh that cannot start (e.g. an unknown airport code) is
+        reported and does not raise.
+        """
+        origin_code, dest_code, departure_date = key
+        if departure_date < date.today():
+            return False
+
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.refreshes += 1
+
+        coro = None
+        try:
+            coro = cached_search_flights(
+                flight_origin=get_city_name(origin_code),
+                flight_dest=get_city_name(dest_code),
+                departure_date=departure_date.isoformat(),
+                passengers_count=(1, 0, 0),
+                flight_class="Economy",
+            )
+            future = submit(coro)
+        except Exception as e:
+            # Serving the stored rows does not depend on the refresh
+            if coro is not None:
+                coro.close()
+            with self._lock:
+                self._refreshing.discard(key)
+                self.refreshes -= 1
+            logger.warning(
+                "Background refresh of %s->%s on %s could not start: %s",
+                origin_code,
+                dest_code,
+                departure_date,
+                e,
+            )
+            return False
+
+        future.add_done_callback(lambda f: self._refresh_done(key, f))
+        return True
+
+    def _refresh_done(self, key: RouteDate, future) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+        if not future.cancelled() and future.exception() is not None:
+            origin_code, dest_code, departure_date = key
+            logger.warning(
+                "Background refresh of %s->%s on %s failed: %s",
+                origin_code,
+                dest_code,
+                departure_date,
+                future.exception(),
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"refreshing": len(self._refreshing), "refreshes": self.refreshes}
+
+
+def _route_date(row: Dict[str, Any]) -> Optional[RouteDate]:
+    try:
+        return (
+            row["origin_code"],
+            row["dest_code"],
+            datetime.fromisoformat(row["departure_datetime"]).date(),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+fresh_flight_lookup = FreshFlightLookup()
@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from agents.browser.loop import submit
+from agents.flight_team.crawl.cache import cached_search_flights
+from agents.flight_team.crawl.exceptions import (
+    DateConversionError,
+    InvalidAirportCodeError,
+)
+from agents.flight_team.crawl.utils.airport_codes import (
+    get_airport_code,
+    get_city_name,
+)
+from agents.flight_team.crawl.utils.date import convert_to_gregorian
+from agents.flight_team.db import Database
+from agents.flight_team.freshness import Freshness, FreshnessPolicy
+
+logger = logging.getLogger(__name__)
+
+PREWARM_ENABLED = os.getenv("FLIGHT_PREWARM_ENABLED", "1") == "1"
+# Days ahead, starting today, that popular routes are kept crawled for
+PREWARM_HORIZON_DAYS = int(os.getenv("FLIGHT_PREWARM_HORIZON_DAYS", "3"))
+# Most popular routes pre-crawled over the whole horizon
+PREWARM_TOP_ROUTES = int(os.getenv("FLIGHT_PREWARM_TOP_ROUTES", "5"))
+# Minimum seconds between two pre-crawls, plus up to PREWARM_JITTER more
+PREWARM_INTERVAL = float(os.getenv("FLIGHT_PREWARM_INTERVAL", "60"))
+PREWARM_JITTER = float(os.getenv("FLIGHT_PREWARM_JITTER", "30"))
+# Seconds between two passes over the planned routes and dates
+PREWARM_CYCLE = float(os.getenv("FLIGHT_PREWARM_CYCLE", "300"))
+# Route popularity halves every this many seconds
+POPULARITY_HALF_LIFE = 24 * 3600
+
+# Routes pre-crawled before any query has been seen, comma-separated
+# "Origin-Destination" pairs
+SEED_ROUTES = [
+    tuple(route.strip().split("-", 1))
+    for route in os.getenv(
+        "FLIGHT_PREWARM_ROUTES", "Tehran-Mashhad,Tehran-Kish Island,Tehran-Shiraz"
+    ).split(",")
+    if "-" in route
+]
+
+Route = Tuple[str, str]
+Target = Tuple[str, str, date]
+
+
+class RoutePrewarmer:
+    """
+    Keeps the flights table warm for the routes users ask about.
+
+    Every served query is recorded with `record`, which scores its route by
+    a popularity that decays over time. A background task on the crawler
+    loop repeatedly plans (origin, destination, date) targets - the most
+    popular routes over the next PREWARM_HORIZON_DAYS days, plus any future
+    date that was asked for more than once - and crawls the ones without
+    fresh flights through the search cache, one at a time with a jittered
+    pause in between.
+    """
+
+    def __init__(
+        self,
+        horizon_days: int = PREWARM_HORIZON_DAYS,
+        top_routes: int = PREWARM_TOP_ROUTES,
+        interval: float = PREWARM_INTERVAL,
+        jitter: float = PREWARM_JITTER,
+        cycle: float = PREWARM_CYCLE,
+        seed_routes: Optional[List[Route]] = None,
+        policy: Optional[FreshnessPolicy] = None,
+    ):
+        self.horizon_days = horizon_days
+        self.top_routes = top_routes
+        self.interval = interval
+        self.jitter = jitter
+        self.cycle = cycle
+        self.policy = policy or FreshnessPolicy()
+
+        self.crawled = 0
+        self.failed = 0
+
+        self._popularity: Dict[Route, Tuple[float, float]] = {}
+        self._requested_dates: Dict[Target, int] = {}
+        self._queue: List[Target] = []
+        self._covered = 0
+        self._planned = 0
+        self._lock = threading.Lock()
+        self._task = None
+        # Resolved on the first planning pass, so that creating a prewarmer
+        # does not load the airports index
+        self._seed_routes: Optional[List[Route]] = (
+            SEED_ROUTES if seed_routes is None else seed_routes
+        )
+
+    def _seed(self) -> None:
+        with self._lock:
+            seed_routes, self._seed_routes = self._seed_routes, None
+        if not seed_routes:
+            return
+
+        now = time.time()
+        routes = [_canonical_route(origin, dest) for origin, dest in seed_routes]
+        with self._lock:
+            for route in routes:
+                # Routes already asked about keep their score
+                if route and route not in self._popularity:
+                    self._popularity[route] = (1.0, now)
+
+    def record(self, origin: str, dest: str, departure_date: str) -> None:
+        """Count a served query for a route and date."""
+        route = _canonical_route(origin, dest)
+        if route is None:
+            return
+        try:
+            day = date.fromisoformat(convert_to_gregorian(departure_date.strip()))
+        except (DateConversionError, ValueError):
+            day = None
+
+        now = time.time()
+        with self._lock:
+            self._popularity[route] = (self._score(route, now) + 1, now)
+            if day is not None and day >= date.today():
+                target = (*route, day)
+                self._requested_dates[target] = self._requested_dates.get(target, 0) + 1
+
+    def _score(self, route: Route, now: float) -> float:
+        score, updated = self._popularity.get(route, (0.0, now))
+        return score * 0.5 ** ((now - updated) / POPULARITY_HALF_LIFE)
+
+    def popular_routes(self) -> List[Tuple[Route, float]]:
+        now = time.time()
+        with self._lock:
+            scores = [(route, self._score(route, now)) for route in self._popularity]
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores[: self.top_routes]
+
+    def plan(self) -> List[Target]:
+        """Routes and dates to keep warm, most popular first."""
+        self._seed()
+        today = date.today()
+        targets = [
+            (*route, today + timedelta(days=offset))
+            for offset in range(self.horizon_days)
+            for route, _ in self.popular_routes()
+        ]
+
+        with self._lock:
+            for target in [t for t in self._requested_dates if t[2] < today]:
+                del self._requested_dates[target]
+            requested = sorted(
+                self._requested_dates.items(), key=lambda item: item[1], reverse=True
+            )
+        targets.extend(
+            target for target, count in requested if count > 1 and target not in targets
+        )
+        return targets
+
+    def is_fresh(self, target: Target) -> bool:
+        origin, dest, day = target
+        db = Database()
+        for origin_code in get_airport_code(origin):
+            for dest_code in get_airport_code(dest):
+                updated_at = db.last_updated(origin_code, dest_code, day)
+                if (
+                    self.policy.classify(origin_code, dest_code, updated_at)
+                    is Freshness.FRESH
+                ):
+                    return True
+        return False
+
+    async def run(self) -> None:
+        """Pre-crawl planned targets forever; runs on the crawler loop."""
+        while True:
+            try:
+                await self._run_cycle()
+            except Exception:
+                # One bad cycle (e.g. the database was locked) must not stop
+                # pre-warming for the rest of the process
+                logger.exception("Route pre-warming cycle failed")
+            await asyncio.sleep(self.cycle + random.uniform(0, self.jitter))
+
+    async def _run_cycle(self) -> None:
+        targets = self.plan()
+        # Database reads stay off the crawler loop
+        queue = await asyncio.to_thread(
+            lambda: [target for target in targets if not self.is_fresh(target)]
+        )
+        with self._lock:
+            self._planned = len(targets)
+            self._covered = len(targets) - len(queue)
+            self._queue = list(queue)
+
+        for target in queue:
+            warmed = await self._crawl(target)
+            with self._lock:
+                self._queue.remove(target)
+                self._covered += warmed
+            await asyncio.sleep(self.interval + random.uniform(0, self.jitter))
+
+    async def _crawl(self, target: Target) -> bool:
+        origin, dest, day = target
+        if await asyncio.to_thread(self.is_fresh, target):
+            # A user search got there first
+            return True
+        try:
+            await cached_search_flights(
+                flight_origin=origin,
+                flight_dest=dest,
+                departure_date=day.isoformat(),
+                passengers_count=(1, 0, 0),
+                flight_class="Economy",
+            )
+        except Exception as e:
+            self.failed += 1
+            logger.warning(
+                "Pre-crawling flights from %s to %s on %s failed: %s",
+                origin,
+                dest,
+                day,
+                e,
+            )
+            return False
+        self.crawled += 1
+        return True
+
+    def start(self) -> None:
+        """Start pre-crawling in the background, if not started already."""
+        with self._lock:
+            if self._task is not None:
+                return
+            self._task = submit(self.run())
+        self._task.add_done_callback(self._stopped)
+
+    def _stopped(self, task) -> None:
+        # Let `start` run it again
+        with self._lock:
+            if self._task is task:
+                self._task = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Route pre-warming stopped: %s", task.exception())
+
+    def stop(self) -> None:
+        with self._lock:
+            task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            queue = list(self._queue)
+            planned, covered = self._planned, self._covered
+            running = self._task is not None and not self._task.done()
+        return {
+            "running": running,
+            "planned": planned,
+            "covered": covered,
+            "coverage": covered / planned if planned else 0.0,
+            "queued": [(o, d, day.isoformat()) for o, d, day in queue],
+            "crawled": self.crawled,
+            "failed": self.failed,
+            "popular_routes": [
+                (f"{o}-{d}", round(score, 2)) for (o, d), score in self.popular_routes()
+            ],
+        }
+
+
+def _city(place: str) -> str:
+    """The city a city name (any spelling or language) or an IATA code is in."""
+    try:
+        return get_city_name(get_airport_code(place)[0])
+    except InvalidAirportCodeError:
+        # The flight tools also pass airport codes, e.g. "THR"
+        return get_city_name(place)
+
+
+def _canonical_route(origin: str, dest: str) -> Optional[Route]:
+    # One key per route, whatever spelling, language or code it was asked in
+    try:
+        return _city(origin), _city(dest)
+    except InvalidAirportCodeError:
+        return None
+
+
+route_prewarmer = RoutePrewarmer()
+
+
+def record_route_query(origin: str, dest: str, departure_date: str) -> None:
+    """Feed a served query to `route_prewarmer`, starting it if enabled."""
+    route_prewarmer.record(origin, dest, departure_date)
+    if PREWARM_ENABLED:
+        route_prewarmer.start()
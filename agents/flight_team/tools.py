@@ -1,13 +1,37 @@
-from typing import Annotated, List
-from langchain_core.tools import tool
+from typing import Annotated, Dict, List, Optional
+from langchain_core.tools import StructuredTool, tool
+from agents.browser import arun_in_crawler_loop, run_in_crawler_loop
 from agents.flight_team.crawl.utils.date import convert_to_gregorian
-from agents.flight_team.db import Database
-from agents.flight_team import search_flights
-import asyncio
+from agents.flight_team.db import FlightQuery
+from agents.flight_team.freshness import fresh_flight_lookup
+from agents.flight_team.prewarm import record_route_query
+from agents.flight_team import cached_search_flights, search_flights_by_date_range
 
 
-@tool
-def search_available_flights(
+async def _search_available_flights(
+    origin: str,
+    destination: str,
+    date: str,
+    adult_count: int = 1,
+    child_count: int = 0,
+    infant_count: int = 0,
+    flight_class: str = "Economy",
+    return_date: Optional[str] = None,
+) -> List[dict]:
+    record_route_query(origin, destination, date)
+    if return_date:
+        record_route_query(destination, origin, return_date)
+    return await cached_search_flights(
+        flight_origin=origin,
+        flight_dest=destination,
+        departure_date=date,
+        passengers_count=(adult_count, child_count, infant_count),
+        flight_class=flight_class,
+        arrival_date=return_date,
+    )
+
+
+def _search_available_flights_sync(
     origin: Annotated[
         str, "The departure city airport English name (e.g. 'Tehran', 'Mashhad')"
     ],
@@ -16,46 +40,130 @@ def search_available_flights(
     ],
     date: Annotated[str, "The departure date in YYYY-MM-DD format"],
     adult_count: Annotated[int, "Number of adult passengers"] = 1,
-    child_count: Annotated[int, "Number of adult passengers"] = 0,
-    infant_count: Annotated[int, "Number of adult passengers"] = 0,
+    child_count: Annotated[int, "Number of child passengers"] = 0,
+    infant_count: Annotated[int, "Number of infant passengers"] = 0,
     flight_class: Annotated[
         str, "Class of service (Economy, Business, or First)"
     ] = "Economy",
+    return_date: Annotated[
+        Optional[str],
+        "The return date in YYYY-MM-DD format, for a round trip",
+    ] = None,
 ) -> List[dict]:
-    """Search for available flights using the flight search API"""
-    flights = asyncio.run(
-        search_flights(
-            flight_origin=origin,
-            flight_dest=destination,
-            departure_date=date,
-            passengers_count=(adult_count, child_count, infant_count),
-            flight_class=flight_class,
+    """Search for available flights using the flight search API. For a round
+    trip, pass return_date: both legs are searched at once and each flight is
+    marked with its "leg" ("outbound" or "return")."""
+    return run_in_crawler_loop(
+        _search_available_flights(
+            origin,
+            destination,
+            date,
+            adult_count,
+            child_count,
+            infant_count,
+            flight_class,
+            return_date,
         )
     )
-    return flights
 
 
-@tool
-def query_flight_database(
-    query: Annotated[str, "SQL-like query string to search the flight database"],
-) -> List[dict]:
-    """Query the flight database for stored flight information.
-    Here is the flights table schema:
-    CREATE TABLE IF NOT EXISTS flights (
-                    airline TEXT NOT NULL,
-                    departure_datetime TEXT NOT NULL,
-                    flight_number TEXT NOT NULL,
-                    origin_city TEXT NOT NULL,
-                    origin_code TEXT NOT NULL,
-                    dest_city TEXT NOT NULL,
-                    dest_code TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+async def _search_available_flights_async(**kwargs) -> List[dict]:
+    return await arun_in_crawler_loop(_search_available_flights(**kwargs))
+
+
+# Every search runs on the shared crawler loop, whether the graph is invoked
+# synchronously or with ainvoke, so the pooled browser is reused across calls
+search_available_flights = StructuredTool.from_function(
+    func=_search_available_flights_sync,
+    coroutine=_search_available_flights_async,
+    name="search_available_flights",
+)
+
+
+async def _search_flights_in_date_range(
+    origin: str,
+    destination: str,
+    date_from: str,
+    date_to: str,
+    adult_count: int = 1,
+    child_count: int = 0,
+    infant_count: int = 0,
+    flight_class: str = "Economy",
+) -> Dict[str, List[dict]]:
+    record_route_query(origin, destination, date_from)
+    return await search_flights_by_date_range(
+        flight_origin=origin,
+        flight_dest=destination,
+        date_from=date_from,
+        date_to=date_to,
+        passengers_count=(adult_count, child_count, infant_count),
+        flight_class=flight_class,
     )
 
-    Note that the city names MUST be in English.
+
+def _search_flights_in_date_range_sync(
+    origin: Annotated[
+        str, "The departure city airport English name (e.g. 'Tehran', 'Mashhad')"
+    ],
+    destination: Annotated[
+        str, "The arrival city airport English name (e.g., 'Tehran', 'Mashhad')"
+    ],
+    date_from: Annotated[str, "The first departure date in YYYY-MM-DD format"],
+    date_to: Annotated[str, "The last departure date (inclusive) in YYYY-MM-DD format"],
+    adult_count: Annotated[int, "Number of adult passengers"] = 1,
+    child_count: Annotated[int, "Number of child passengers"] = 0,
+    infant_count: Annotated[int, "Number of infant passengers"] = 0,
+    flight_class: Annotated[
+        str, "Class of service (Economy, Business, or First)"
+    ] = "Economy",
+) -> Dict[str, List[dict]]:
+    """Search for available flights on every departure date in a range (up to
+    two weeks) in one call, e.g. for "any flight this week". Returns the
+    flights per departure date."""
+    return run_in_crawler_loop(
+        _search_flights_in_date_range(
+            origin,
+            destination,
+            date_from,
+            date_to,
+            adult_count,
+            child_count,
+            infant_count,
+            flight_class,
+        )
+    )
+
+
+async def _search_flights_in_date_range_async(**kwargs) -> Dict[str, List[dict]]:
+    return await arun_in_crawler_loop(_search_flights_in_date_range(**kwargs))
+
+
+search_flights_in_date_range = StructuredTool.from_function(
+    func=_search_flights_in_date_range_sync,
+    coroutine=_search_flights_in_date_range_async,
+    name="search_flights_in_date_range",
+)
+
+
+def _find_flights(**kwargs) -> List[dict]:
+    """Find stored flights on a route and date range.
+
+    Cities may be given in English or Persian, or as IATA codes, and dates in
+    the Gregorian or Jalali calendar. Flights whose stored data is too old are
+    left out, so an empty result means a live search is needed. Each flight
+    carries its last_updated time.
     """
-    db = Database()
-    return db.query_flights(query)
+    query = FlightQuery(**kwargs)
+    record_route_query(query.origin, query.destination, query.date_from)
+    return fresh_flight_lookup.find(query)
+
+
+# Runs one parameterized, indexed query instead of SQL written by the model
+find_flights = StructuredTool.from_function(
+    func=_find_flights,
+    name="find_flights",
+    args_schema=FlightQuery,
+)
 
 
 @tool
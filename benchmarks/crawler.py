@@ -0,0 +1,243 @@
+"""
+Crawler throughput against the fixture server, fully offline.
+
+Drives `search_flights_by_date_range`, `scrape_flights` and
+`process_blog_posts` against the recorded pages and reports the browser
+startup cost, results pages per second, extraction time per flight card
+and the memory of the process and its browsers. Blog posts are extracted
+with a stand-in for the LLM, so only the crawling is timed.
+
+    python -m benchmarks.crawler --days 3 --json crawler.json
+    python -m benchmarks.crawler --baseline crawler.json  # exit 1 on regressions
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from benchmarks.server import FixtureServer
+
+# name -> True if higher is better
+METRICS = {
+    "browser_startup_s": False,
+    "context_reuse_s": False,
+    "search_latency_s": False,
+    "results_pages_per_s": True,
+    "card_extraction_batch_ms": False,
+    "card_extraction_per_card_ms": False,
+    "blog_pages_per_s": True,
+    "peak_rss_mb": False,
+}
+
+
+def _process_tree_rss(pid: int) -> int:
+    """Resident memory in bytes of a process and all of its descendants (Linux)."""
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{entry}/statm") as f:
+                rss[int(entry)] = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total
+
+
+async def _run(
+    server: FixtureServer, origin: str, dest: str, days: int, runs: int
+) -> Dict[str, float]:
+    # Imported once FLIGHT_SITE_URL and CRAWLER_ALLOWED_DOMAINS are set
+    from langchain_core.runnables import RunnableLambda
+
+    from agents.blog_team.crawl.blog_crawler import process_blog_posts
+    from agents.blog_team.schema import BlogPost
+    from agents.browser import BrowserPool
+    from agents.flight_team.crawl.flight_crawler import (
+        scrape_flights,
+        search_flights,
+        search_flights_by_date_range,
+    )
+    from agents.flight_team.crawl.utils.airport_codes import get_airport_code
+
+    results: Dict[str, float] = {}
+    peak_rss = 0
+
+    def sample_memory() -> None:
+        nonlocal peak_rss
+        peak_rss = max(peak_rss, _process_tree_rss(os.getpid()))
+
+    pool = BrowserPool()
+
+    start = time.perf_counter()
+    async with pool.context():
+        pass
+    results["browser_startup_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    async with pool.context():
+        pass
+    results["context_reuse_s"] = time.perf_counter() - start
+    sample_memory()
+
+    first_day = date.today() + timedelta(days=1)
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await search_flights(origin, dest, first_day.isoformat(), (1, 0, 0), "Economy")
+        latencies.append(time.perf_counter() - start)
+    results["search_latency_s"] = statistics.median(latencies)
+    sample_memory()
+
+    route_pairs = sum(1 for code in get_airport_code(origin) if code != "IKA") * len(
+        get_airport_code(dest)
+    )
+    start = time.perf_counter()
+    flights_by_date = await search_flights_by_date_range(
+        origin,
+        dest,
+        first_day.isoformat(),
+        (first_day + timedelta(days=days - 1)).isoformat(),
+        (1, 0, 0),
+        "Economy",
+    )
+    elapsed = time.perf_counter() - start
+    results["results_pages_per_s"] = len(flights_by_date) * route_pairs / elapsed
+    sample_memory()
+
+    for mode in ("batch", "per_card"):
+        timings = []
+        for _ in range(runs):
+            async with pool.page() as page:
+                await page.goto(server.url("flight_results.html"))
+                await page.wait_for_selector(".flight-card")
+                cards = len(await page.query_selector_all(".flight-card"))
+
+                start = time.perf_counter()
+                await scrape_flights(
+                    page, "THR", "MHD", first_day.isoformat(), mode=mode
+                )
+                timings.append((time.perf_counter() - start) / cards)
+        results[f"card_extraction_{mode}_ms"] = statistics.median(timings) * 1000
+    sample_memory()
+
+    extractor = RunnableLambda(
+        lambda prompt: BlogPost(
+            title="benchmark",
+            content=prompt[:1000],
+            url=prompt.rsplit("URL: ", 1)[-1],
+        )
+    )
+    blog_urls = [server.url("blog_post.html")] * (runs * 5)
+    start = time.perf_counter()
+    posts = [post async for post in process_blog_posts(blog_urls, extractor)]
+    results["blog_pages_per_s"] = len(posts) / (time.perf_counter() - start)
+    sample_memory()
+
+    await pool.close()
+    results["peak_rss_mb"] = peak_rss / (1024 * 1024)
+    return results
+
+
+def _regressions(
+    results: Dict[str, float], baseline: Dict[str, float], tolerance: float
+) -> List[str]:
+    failures = []
+    for name, higher_is_better in METRICS.items():
+        if name not in baseline or name not in results:
+            continue
+        before, after = baseline[name], results[name]
+        if higher_is_better:
+            worse = after < before * (1 - tolerance)
+        else:
+            worse = after > before * (1 + tolerance)
+        if worse:
+            failures.append(f"{name}: {before:.3f} -> {after:.3f}")
+    return failures
+
+
+def run(
+    origin: str,
+    dest: str,
+    days: int,
+    runs: int,
+    json_path: Optional[str] = None,
+    baseline_path: Optional[str] = None,
+    tolerance: float = 0.2,
+) -> int:
+    with FixtureServer() as server, tempfile.TemporaryDirectory() as tmp:
+        os.environ["FLIGHT_SITE_URL"] = server.base_url
+        os.environ["CRAWLER_ALLOWED_DOMAINS"] = server.host
+        os.environ["FLIGHT_FETCH_ENGINE"] = "playwright"
+
+        # Crawled flights go to a throwaway database
+        from agents.flight_team.db import Database
+
+        Database(path=os.path.join(tmp, "flights.db"))
+
+        results = asyncio.run(_run(server, origin, dest, days, runs))
+
+    print(f"{'metric':<30}{'value':>12}")
+    for name, value in results.items():
+        print(f"{name:<30}{value:>12.3f}")
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            failures = _regressions(results, json.load(f), tolerance)
+        if failures:
+            print(f"\nRegressed by more than {tolerance:.0%}:")
+            for failure in failures:
+                print(f"  {failure}")
+            return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--origin", default="Tehran")
+    parser.add_argument("--dest", default="Istanbul")
+    parser.add_argument("--days", type=int, default=3, help="Dates in the batch search")
+    parser.add_argument("--runs", type=int, default=3, help="Repeats per measurement")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Compare against results saved with --json")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="Allowed regression (0.2 = 20%%)"
+    )
+    args = parser.parse_args()
+
+    sys.exit(
+        run(
+            args.origin,
+            args.dest,
+            args.days,
+            args.runs,
+            args.json,
+            args.baseline,
+            args.tolerance,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Flight query latency on a large flights table, before and after the
+natural-key and covering-index migration.
+
+A database with the original schema (no keys, no indexes) is filled with
+exactly `--rows` rows, where every flight appears as two snapshots (same
+natural key, different created_at) like repeated searches used to leave
+behind. Typical route + date queries are timed on it,
+then `Database` migrates it and the same queries are timed again.
+
+    python -m benchmarks.db_query --rows 1000000
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from agents.flight_team.db.database import Database
+from agents.flight_team.db.models import Flight
+
+ROUTES = [
+    ("THR", "Tehran", "MHD", "Mashhad"),
+    ("THR", "Tehran", "KIH", "Kish Island"),
+    ("THR", "Tehran", "SYZ", "Shiraz"),
+    ("THR", "Tehran", "IFN", "Isfahan"),
+    ("THR", "Tehran", "TBZ", "Tabriz"),
+    ("THR", "Tehran", "BND", "Bandar Abbas"),
+    ("THR", "Tehran", "AWZ", "Ahwaz"),
+    ("IKA", "Tehran", "IST", "Istanbul"),
+    ("IKA", "Tehran", "DXB", "Dubai"),
+    ("IKA", "Tehran", "NJF", "Najaf"),
+]
+AIRLINES = ["Iran Air", "Mahan Air", "Iran Aseman", "Kish Air", "Qeshm Air", "Zagros"]
+SNAPSHOTS = 2
+
+QUERIES = {
+    "route+date (codes)": (
+        "SELECT * FROM flights WHERE origin_code = ? AND dest_code = ? "
+        "AND departure_datetime >= ? AND departure_datetime < ?",
+        ("THR", "MHD", "2025-06-01", "2025-06-02"),
+    ),
+    "route+date (cities)": (
+        "SELECT * FROM flights WHERE origin_city = ? AND dest_city = ? "
+        "AND departure_datetime >= ? AND departure_datetime < ?",
+        ("Tehran", "Kish Island", "2025-06-01", "2025-06-08"),
+    ),
+    "next 50 on route": (
+        "SELECT airline, departure_datetime, flight_number FROM flights "
+        "WHERE origin_code = ? AND dest_code = ? AND departure_datetime >= ? "
+        "ORDER BY departure_datetime LIMIT 50",
+        ("THR", "SYZ", "2025-06-01"),
+    ),
+}
+
+
+def _populate(path: str, rows: int) -> int:
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE flights (
+            airline TEXT NOT NULL,
+            departure_datetime TEXT NOT NULL,
+            flight_number TEXT NOT NULL,
+            origin_city TEXT NOT NULL,
+            origin_code TEXT NOT NULL,
+            dest_city TEXT NOT NULL,
+            dest_code TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    start = datetime(2025, 1, 1)
+    # Enough flights per day and route to reach `rows` within a year
+    flights_per_day = max(1, -(-rows // (SNAPSHOTS * len(ROUTES) * 365)))
+
+    def generate():
+        produced = 0
+        for day in range(365):
+            for route_index, route in enumerate(ROUTES):
+                origin_code, origin_city, dest_code, dest_city = route
+                for n in range(flights_per_day):
+                    departure = start + timedelta(
+                        days=day, minutes=(n * 1440) // flights_per_day
+                    )
+                    # Fixed per flight, so that its snapshots share the
+                    # natural key
+                    airline = AIRLINES[(route_index + n) % len(AIRLINES)]
+                    for snapshot in range(SNAPSHOTS):
+                        if produced >= rows:
+                            return
+                        yield (
+                            airline,
+                            departure.isoformat(),
+                            f"{dest_code}{n:04d}",
+                            origin_city,
+                            origin_code,
+                            dest_city,
+                            dest_code,
+                            (start + timedelta(hours=snapshot)).isoformat(),
+                        )
+                        produced += 1
+
+    conn.executemany("INSERT INTO flights VALUES (?, ?, ?, ?, ?, ?, ?, ?)", generate())
+    conn.commit()
+    populated = conn.execute("SELECT COUNT(*) FROM flights").fetchone()[0]
+    conn.close()
+    return populated
+
+
+def _time_queries(conn: sqlite3.Connection, repeats: int) -> dict:
+    results = {}
+    for name, (sql, params) in QUERIES.items():
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            timings.append(time.perf_counter() - start)
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        results[name] = (statistics.median(timings), plan[-1][-1])
+    return results
+
+
+def run(rows: int, repeats: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flights.db")
+
+        start = time.perf_counter()
+        rows = _populate(path, rows)
+        print(f"Populated {rows:,} rows in {time.perf_counter() - start:.1f}s")
+
+        conn = sqlite3.connect(path)
+        before = _time_queries(conn, repeats)
+        conn.close()
+
+        start = time.perf_counter()
+        db = Database(path=path)
+        migrated_rows = db.conn.execute("SELECT COUNT(*) FROM flights").fetchone()[0]
+        print(
+            f"Migrated in {time.perf_counter() - start:.1f}s, "
+            f"{rows - migrated_rows:,} duplicate rows removed"
+        )
+        after = _time_queries(db.conn, repeats)
+
+        flights = [
+            Flight(
+                airline="Iran Air",
+                departure_datetime=datetime(2025, 6, 1) + timedelta(minutes=i),
+                flight_number=f"MHD{i:04d}",
+                origin_city="Tehran",
+                origin_code="THR",
+                dest_city="Mashhad",
+                dest_code="MHD",
+            )
+            for i in range(1000)
+        ]
+        start = time.perf_counter()
+        db.insert_flights(flights)
+        print(f"Upserted 1,000 flights in {(time.perf_counter() - start) * 1000:.1f}ms")
+        db.close()
+
+    print()
+    print(f"{'query':<22}{'before (ms)':>12}{'after (ms)':>12}  plan after")
+    for name in QUERIES:
+        before_ms, _ = before[name]
+        after_ms, plan = after[name]
+        print(f"{name:<22}{before_ms * 1000:>12.2f}{after_ms * 1000:>12.2f}  {plan}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Flight query latency before and after the index migration."
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    run(args.rows, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Page-ready time of the crawled pages with and without resource blocking.
+
+"before" loads a fixture page the way the crawlers used to: full load, wait
+for `networkidle`, then for the content. "after" installs
+`block_heavy_resources` with its defaults (images, fonts and media aborted,
+every host allowed) and waits only for the content itself. "allowlist" also
+aborts every host but the fixture server's, like `CRAWLER_ALLOWED_DOMAINS`.
+
+    python -m benchmarks.page_ready --runs 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from typing import Tuple
+
+from playwright.async_api import Browser, async_playwright
+
+from agents.browser.routing import (
+    BLOCKED_RESOURCE_TYPES,
+    block_heavy_resources,
+    wait_for_selector_or_idle,
+)
+from benchmarks.server import FixtureServer
+
+
+async def _flight_results_ready(
+    browser: Browser, url: str, optimized: bool, allowed_domains: Tuple[str, ...]
+) -> float:
+    context = await browser.new_context()
+    if optimized:
+        await block_heavy_resources(context, allowed_domains=allowed_domains)
+    page = await context.new_page()
+
+    start = time.perf_counter()
+    await page.goto(url)
+    if optimized:
+        await page.wait_for_selector("#flightResultContainer")
+        if not await wait_for_selector_or_idle(page, ".flight-card"):
+            raise RuntimeError("No flight cards rendered")
+    else:
+        await page.wait_for_load_state("networkidle")
+        await page.wait_for_selector("#flightResultContainer")
+        await page.wait_for_selector(".flight-card", timeout=5000)
+    elapsed = time.perf_counter() - start
+
+    await context.close()
+    return elapsed
+
+
+async def _blog_post_ready(
+    browser: Browser, url: str, optimized: bool, allowed_domains: Tuple[str, ...]
+) -> float:
+    context = await browser.new_context()
+    page = await context.new_page()
+    if optimized:
+        await block_heavy_resources(
+            page,
+            allowed_domains=allowed_domains,
+            blocked_resource_types=BLOCKED_RESOURCE_TYPES | {"stylesheet"},
+        )
+
+    start = time.perf_counter()
+    if optimized:
+        await page.goto(url, wait_until="domcontentloaded")
+    else:
+        await page.goto(url)
+        await page.wait_for_load_state("networkidle")
+    await page.content()
+    elapsed = time.perf_counter() - start
+
+    await context.close()
+    return elapsed
+
+
+PAGES = {
+    "flight_results": ("flight_results.html", _flight_results_ready),
+    "blog_post": ("blog_post.html", _blog_post_ready),
+}
+
+
+async def run(runs: int) -> None:
+    with FixtureServer() as server:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+
+            print(
+                f"{'page':<16}{'before (s)':>12}{'after (s)':>12}"
+                f"{'allowlist (s)':>15}{'speedup':>10}"
+            )
+            for name, (path, measure) in PAGES.items():
+                url = server.url(path)
+
+                async def median(optimized: bool, allowed_domains=()) -> float:
+                    return statistics.median(
+                        [
+                            await measure(browser, url, optimized, allowed_domains)
+                            for _ in range(runs)
+                        ]
+                    )
+
+                before = await median(False)
+                after = await median(True)
+                allowlist = await median(True, (server.host,))
+                print(
+                    f"{name:<16}{before:>12.3f}{after:>12.3f}{allowlist:>15.3f}"
+                    f"{before / after:>9.1f}x"
+                )
+
+            await browser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="Loads per page and mode")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import mimetypes
+import os
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Simulated latency (seconds) per kind of resource, roughly what the live
+# site's CDN, ad and chat endpoints cost
+DEFAULT_DELAYS = {
+    "asset": 0.4,  # images, fonts, media
+    "api": 0.3,  # the flight results XHR
+    "third_party": 0.8,  # analytics, ads, chat widgets
+}
+
+ASSET_SIZE = 200 * 1024  # bytes
+
+
+class _FixtureHandler(SimpleHTTPRequestHandler):
+    server: "_FixtureHTTPServer"
+
+    def __init__(self, request, client_address, server):
+        super().__init__(request, client_address, server, directory=server.directory)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body: bytes, content_type: str, status: int = 200) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _delay(self, kind: str) -> None:
+        time.sleep(self.server.delays.get(kind, 0))
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+
+        if path.startswith("/assets/"):
+            # Synthesized images, fonts and media of a fixed size
+            self._delay("asset")
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            self._send(b"\0" * ASSET_SIZE, content_type)
+        elif path.startswith("/third-party/"):
+            self._delay("third_party")
+            self._send(b"/* tracker */", "application/javascript")
+        elif path.startswith("/api/flights"):
+            self._delay("api")
+            self._send(self.server.flights_payload, "application/json")
+        elif path.startswith("/flights/result/"):
+            # Every route, date and passenger mix gets the recorded page
+            self.path = "/flight_results.html"
+            super().do_GET()
+        else:
+            super().do_GET()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+
+        if self.path.startswith("/api/flights"):
+            self._delay("api")
+            self._send(self.server.flights_payload, "application/json")
+        elif self.path.startswith("/third-party/"):
+            self._delay("third_party")
+            self._send(b"{}", "application/json")
+        else:
+            self._send(b"not found", "text/plain", status=404)
+
+
+class _FixtureHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, directory: str, delays: Dict[str, float]):
+        self.directory = directory
+        self.delays = delays
+        with open(os.path.join(directory, "flights.json"), "rb") as f:
+            self.flights_payload = f.read()
+        super().__init__(address, _FixtureHandler)
+
+    def handle_error(self, request, client_address):
+        # Pages closed with requests still in flight are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FixtureServer:
+    """
+    Local HTTP server for the recorded pages under benchmarks/fixtures.
+
+    Static fixture files are served as they are. Besides them the server
+    answers:
+        /assets/*       synthesized images/fonts/media after the "asset" delay
+        /third-party/*  tracker-like scripts and beacons after the
+                        "third_party" delay; pages reference these through
+                        the `localhost` host so that they count as third-party
+                        next to the `127.0.0.1` pages
+        /api/flights    the recorded flights.json after the "api" delay
+        /flights/result/*
+                        flight_results.html, for the URLs search_flights
+                        opens when FLIGHT_SITE_URL points at the server
+
+    Usage:
+        with FixtureServer() as server:
+            url = server.url("flight_results.html")
+    """
+
+    def __init__(
+        self,
+        directory: str = FIXTURES_DIR,
+        delays: Optional[Dict[str, float]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.host = host
+        self._server = _FixtureHTTPServer(
+            (host, port), directory, {**DEFAULT_DELAYS, **(delays or {})}
+        )
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
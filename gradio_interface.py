@@ -1,5 +1,9 @@
+import logging
+import os
+
 import gradio as gr
 from agents.workflow import create_workflow
+from agents.flight_team.db.maintenance import MaintenanceScheduler
 from agents.orchestrator.state import State
 from typing import Generator
 from dotenv import load_dotenv
@@ -55,6 +59,15 @@ def create_demo() -> gr.Interface:
 
 
 def main():
+    # Crawler spans and warnings go through logging
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO"),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    # Purge departed flights and compact flights.db in the background
+    MaintenanceScheduler().start()
+
     demo = create_demo()
 
     demo.launch(